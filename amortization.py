@@ -0,0 +1,105 @@
+# amortization.py
+# Contains vectorized loan amortization schedules and scenario sweeps
+
+import numpy as np
+
+from engine import INTEREST_RATE, payment_factor
+
+
+CACHED_PAIRS = 256
+
+
+def _factor_array(rates, terms):
+    months = terms * 12
+    monthly_interest = rates / 12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = (1 + monthly_interest) ** months
+        factors = np.where(monthly_interest > 0, monthly_interest * growth / (growth - 1), 1 / months)
+    return np.where(months > 0, factors, 0.0)
+
+
+def payment_factors(rates, terms):
+    # Payment per unit borrowed for every (rate, term). Real ledgers use a few
+    # distinct pairs, which come from engine's cache; wide sweeps with many
+    # distinct pairs are computed in one vectorized pass instead.
+    rates, terms = np.broadcast_arrays(np.asarray(rates, dtype=float), np.asarray(terms, dtype=float))
+    pairs, inverse = np.unique(np.stack([rates.ravel(), terms.ravel()], axis=1), axis=0, return_inverse=True)
+    if len(pairs) <= CACHED_PAIRS:
+        factors = np.array([payment_factor(float(r), float(t)) for r, t in pairs])
+    else:
+        factors = _factor_array(pairs[:, 0], pairs[:, 1])
+    return factors[inverse.ravel()].reshape(rates.shape)
+
+
+def monthly_payments(amounts, rates=INTEREST_RATE, terms=4):
+    amounts = np.asarray(amounts, dtype=float)
+    return amounts * payment_factors(rates, terms)
+
+
+def schedule(amounts, rates=INTEREST_RATE, terms=4, prepayments=None):
+    # Full month-by-month schedules for many loans at once. Every argument
+    # broadcasts against the others; prepayments is either an extra amount
+    # per month per loan, or an (n_loans, n_months) plan. Returns a dict of
+    # (n_loans, n_months) arrays padded with zeros after each loan ends.
+    amounts, rates, terms = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(amounts, dtype=float)),
+        np.atleast_1d(np.asarray(rates, dtype=float)),
+        np.atleast_1d(np.asarray(terms, dtype=float)),
+    )
+    months = np.rint(terms * 12).astype(int)
+    n_months = int(months.max()) if months.size else 0
+    payment = amounts * payment_factors(rates, terms)
+    monthly_interest = rates / 12
+    k = np.arange(1, n_months + 1)
+    active = k[None, :] <= months[:, None]
+
+    if prepayments is None:
+        # Closed form: remaining balance after k payments
+        with np.errstate(divide="ignore", invalid="ignore"):
+            growth_n = (1 + monthly_interest) ** months
+            growth_k = (1 + monthly_interest[:, None]) ** k[None, :]
+            balance = amounts[:, None] * (growth_n[:, None] - growth_k) / (growth_n[:, None] - 1)
+            no_interest = monthly_interest == 0
+            if no_interest.any():
+                linear = amounts[:, None] * (1 - k[None, :] / months[:, None])
+                balance[no_interest] = linear[no_interest]
+        balance = np.where(active, np.maximum(balance, 0.0), 0.0)
+        opening = np.concatenate([amounts[:, None], balance[:, :-1]], axis=1)
+        interest = np.where(active, opening * monthly_interest[:, None], 0.0)
+        principal = np.where(active, opening - balance, 0.0)
+        paid = np.where(active, payment[:, None], 0.0)
+        return {"payment": paid, "interest": interest, "principal": principal, "balance": balance}
+
+    extra = np.asarray(prepayments, dtype=float)
+    extra = np.broadcast_to(extra[:, None] if extra.ndim == 1 else extra, (amounts.size, n_months))
+    shape = (amounts.size, n_months)
+    paid = np.zeros(shape)
+    interest = np.zeros(shape)
+    principal = np.zeros(shape)
+    balance = np.zeros(shape)
+    current = amounts.copy()
+    # Vectorized across loans; the month loop is at most term * 12 steps
+    for m in range(n_months):
+        live = (current > 0) & active[:, m]
+        accrued = current * monthly_interest
+        due = np.minimum(payment + extra[:, m], current + accrued)
+        due = np.where(live, due, 0.0)
+        interest[:, m] = np.where(live, accrued, 0.0)
+        principal[:, m] = due - interest[:, m]
+        current = current - principal[:, m]
+        paid[:, m] = due
+        balance[:, m] = current
+    return {"payment": paid, "interest": interest, "principal": principal, "balance": balance}
+
+
+def scenario_sweep(amounts, rates, terms):
+    # Every combination of the given amounts, rates and terms (in years).
+    # Returns payment and total interest grids shaped (amounts, rates, terms).
+    a, r, t = np.meshgrid(
+        np.asarray(amounts, dtype=float), np.asarray(rates, dtype=float),
+        np.asarray(terms, dtype=float), indexing="ij"
+    )
+    # Factors depend only on (rate, term), so compute them on that grid alone
+    payment = a * payment_factors(r[:1], t[:1])
+    total_interest = payment * np.rint(t * 12) - a
+    return {"amount": a, "rate": r, "term": t, "payment": payment, "total_interest": total_interest}
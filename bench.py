@@ -0,0 +1,409 @@
+# bench.py
+# Contains the benchmark suite for the ledger, growth, export and wallet paths.
+# Runs the real FinanceApp headlessly (offscreen Qt) against synthetic ledgers
+# and a local mock Binance server, and compares against a saved baseline.
+#
+#   python bench.py                          full run, compared with the last baseline
+#   python bench.py --quick --save           smaller sizes, then record as a baseline
+#   python bench.py --only load_data,add_data --sizes 1000,100000
+#   python bench.py --baseline 1a2b3c4       compare against the run saved for a commit
+#   python bench.py --only startup --budget 800
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+LEDGER_SIZES = [1000, 100000, 1000000]
+QUICK_LEDGER_SIZES = [1000, 100000]
+WALLET_SIZES = [10, 100, 500]
+QUICK_WALLET_SIZES = [10, 100]
+BENCHMARKS = ["startup", "load_data", "add_data", "show_growth_graph", "export_pdf", "refresh_wallet"]
+HISTORY_FILE = "bench_history.json"
+# A benchmark regresses when its median is this much slower than the
+# baseline and the difference is above the noise floor
+THRESHOLD = 0.25
+NOISE_MS = 2.0
+ADD_BATCH = 50
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+MOCK_LATENCY = 0.02
+WAIT_TIMEOUT = 600
+# Time to first paint, from launching the interpreter; over budget fails the run
+STARTUP_BUDGET_MS = 800
+# Loaded only when a feature is first used; any of these imported before
+# the first paint fails the run
+DEFERRED_MODULES = ["matplotlib", "requests", "websocket", "fpdf", "charts", "report", "binance_client", "live_prices"]
+
+
+def synthetic_entries(n, seed=0):
+    # Ledger entries as add_data would produce them, for n consecutive months
+    import numpy as np
+    from engine import calculate_month
+    from ledger import MONTHS
+    rng = np.random.default_rng(seed)
+    inputs = np.column_stack([
+        rng.uniform(5000, 40000, n), rng.uniform(50, 500, n), rng.uniform(100, 1500, n),
+        rng.uniform(20000, 120000, n), rng.uniform(500, 6000, n), rng.uniform(0, 200000, n),
+    ]).round(2)
+    debt_types = np.where(rng.random(n) < 0.8, "personal", "housing")
+    entries = []
+    for i, (row, debt_type) in enumerate(zip(inputs.tolist(), debt_types.tolist())):
+        entry, _ = calculate_month(MONTHS[i % 12], *row, debt_type=debt_type)
+        entry["Year"] = 2000 + i // 12
+        entries.append(entry)
+    return entries
+
+
+class Harness:
+    # One QApplication for the whole run. Every app instance works in its
+    # own scratch directory, and modal dialogs are replaced so nothing blocks.
+
+    def __init__(self, workdir):
+        from PySide6.QtWidgets import QApplication, QFileDialog, QMessageBox
+        self.workdir = workdir
+        self.qt = QApplication.instance() or QApplication([])
+        self.messages = []
+        self.failures = []
+        record = staticmethod(lambda *args, **kwargs: self.messages.append(args[1:]))
+        QMessageBox.information = QMessageBox.warning = QMessageBox.critical = record
+        QFileDialog.getSaveFileName = staticmethod(
+            lambda *args, **kwargs: (os.path.join(os.getcwd(), "finance_report.pdf"), "")
+        )
+        self._ledgers = {}
+
+    def ledger_file(self, n):
+        # Written once per size and copied into each scratch directory
+        if n not in self._ledgers:
+            from ledger_store import JournalStore
+            path = os.path.join(self.workdir, f"ledger_{n}.json")
+            JournalStore(path).save(synthetic_entries(n))
+            self._ledgers[n] = path
+        return self._ledgers[n]
+
+    def scratch_dir(self, name, ledger_size=0):
+        directory = os.path.join(self.workdir, name)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        if ledger_size:
+            shutil.copyfile(self.ledger_file(ledger_size), os.path.join(directory, "finance_data.json"))
+        return directory
+
+    def open_app(self, name, ledger_size=0):
+        from main_qt import FinanceApp
+        os.chdir(self.scratch_dir(name, ledger_size))
+        app = FinanceApp()
+        self.wait(lambda: app._loader is None)
+        return app
+
+    def close_app(self, app):
+        app.close()
+        os.chdir(self.workdir)
+
+    def wait(self, done, timeout=WAIT_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while not done():
+            if time.monotonic() > deadline:
+                raise TimeoutError("benchmark step did not finish")
+            self.qt.processEvents()
+            time.sleep(0.001)
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def startup_probe(directory):
+    # Runs in a child process: builds the window, waits for its first paint,
+    # then reports which deferred modules had been imported by then
+    from PySide6.QtCore import QEvent, QObject
+    from PySide6.QtWidgets import QApplication
+
+    class PaintWatch(QObject):
+        painted = False
+
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                self.painted = True
+            return False
+
+    os.chdir(directory)
+    qt = QApplication([])
+    watch = PaintWatch()
+    qt.installEventFilter(watch)
+    from main_qt import FinanceApp
+    win = FinanceApp()
+    win.resize(700, 900)
+    win.show()
+    while not watch.painted:
+        qt.processEvents()
+    print(json.dumps({"loaded": [name for name in DEFERRED_MODULES if name in sys.modules]}), flush=True)
+    win.close()
+
+
+def parse_importtime(stderr):
+    # {top-level module: cumulative ms} from python -X importtime output
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            modules[name.strip()] = int(cumulative) / 1000
+    return modules
+
+
+def bench_startup(h, repeat, budget=STARTUP_BUDGET_MS):
+    # Separate interpreters, timed from launch until the probe reports the
+    # first paint; one more run under -X importtime attributes the imports
+    directory = h.scratch_dir("startup", 1000)
+    probe = [sys.executable, "-c", f"import bench; bench.startup_probe({directory!r})"]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get("PYTHONPATH")])))
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        proc = subprocess.Popen(probe, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env)
+        painted = proc.stdout.readline()
+        times.append((time.perf_counter() - started) * 1000)
+        proc.communicate()
+        if not painted:
+            raise RuntimeError("startup probe exited before the first paint")
+    proc = subprocess.run([probe[0], "-X", "importtime"] + probe[1:], capture_output=True, text=True, env=env)
+    imports = parse_importtime(proc.stderr)
+    imports.pop("bench", None)
+    lines = proc.stdout.strip().splitlines()
+    loaded = json.loads(lines[-1])["loaded"] if lines else []
+    slowest = sorted(imports.items(), key=lambda item: -item[1])[:5]
+    print("  slowest imports: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in slowest), flush=True)
+    if loaded:
+        h.failures.append(f"imported before first paint: {', '.join(loaded)}")
+    if statistics.median(times) > budget:
+        h.failures.append(f"time to first paint {statistics.median(times):.0f} ms is over the {budget:.0f} ms budget")
+    return {
+        "startup_first_paint": times,
+        "startup_imports": [sum(imports.values())],
+    }
+
+
+def bench_load_data(h, n, repeat):
+    app = h.open_app(f"load_{n}", n)
+    try:
+        return {f"load_data[{n}]": timed(lambda: (app.load_data(), h.wait(lambda: app._loader is None)), repeat)}
+    finally:
+        h.close_app(app)
+
+
+def bench_add_data(h, n, repeat):
+    # Milliseconds per add_data call, averaged over a batch, with n rows loaded
+    app = h.open_app(f"add_{n}", n)
+    try:
+        from engine import INPUT_KEYS
+        for key, value in zip(INPUT_KEYS, ["10000", "100", "200", "60000", "1500", "50000"]):
+            app.entries[key].setText(value)
+
+        def batch():
+            for _ in range(ADD_BATCH):
+                app.add_data()
+            app.persistence.flush()
+
+        return {f"add_data[{n}]": [t / ADD_BATCH for t in timed(batch, repeat)]}
+    finally:
+        h.close_app(app)
+
+
+def bench_show_growth_graph(h, n, repeat):
+    # The app imports matplotlib on first use; that one-off cost is kept out
+    # of the per-size timings
+    import charts  # noqa: F401
+    app = h.open_app(f"growth_{n}", n)
+    try:
+        app.build_growth_tab()
+        app.cagr_entry.setText("8")
+        app.period_entry.setText("120")
+
+        def cold():
+            app.growth_cache.clear()
+            app.show_growth_graph()
+
+        return {
+            f"show_growth_graph[{n}]": timed(cold, repeat),
+            f"show_growth_graph_cached[{n}]": timed(app.show_growth_graph, repeat),
+        }
+    finally:
+        h.close_app(app)
+
+
+def bench_export_pdf(h, n, repeat):
+    import report  # noqa: F401
+    app = h.open_app(f"pdf_{n}", n)
+    try:
+        def export():
+            app.export_pdf()
+            h.wait(lambda: app.report_job is None)
+
+        return {f"export_pdf[{n}]": timed(export, repeat if n < 1000000 else 1)}
+    finally:
+        h.close_app(app)
+
+
+def bench_refresh_wallet(h, assets, repeat, latency=MOCK_LATENCY):
+    from mock_binance import MockBinanceServer
+    from price_cache import PRICE_CACHE
+    server = MockBinanceServer(n_assets=assets, latency=latency, seed=assets).start()
+    app = h.open_app(f"wallet_{assets}")
+    try:
+        app.build_binance_tab()
+        app.binance_client.base_url = server.url
+        app.binance_client.fx_url = server.url + "/fx"
+        # The mock holds every listed asset for this key
+        server.balances = lambda api_key: [
+            {"asset": a, "free": str(q), "locked": "0.0"} for a, (q, _, _) in server.market.items()
+        ]
+        app.current_wallet = {"api_key": "bench", "api_secret": "bench"}
+        app.current_wallet_name = "bench"
+
+        def refresh():
+            app.refresh_wallet()
+            h.wait(lambda: app.wallet_job is None)
+
+        def cold():
+            PRICE_CACHE.clear()
+            refresh()
+
+        return {
+            f"refresh_wallet[{assets}]": timed(cold, repeat),
+            f"refresh_wallet_cached[{assets}]": timed(refresh, repeat),
+        }
+    finally:
+        h.close_app(app)
+        server.stop()
+
+
+def run(args):
+    only = args.only.split(",") if args.only else BENCHMARKS
+    sizes = [int(s) for s in args.sizes.split(",")] if args.sizes else (QUICK_LEDGER_SIZES if args.quick else LEDGER_SIZES)
+    assets = [int(s) for s in args.assets.split(",")] if args.assets else (QUICK_WALLET_SIZES if args.quick else WALLET_SIZES)
+    sys.path.insert(0, REPO_DIR)
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="finance-bench-")
+    results = {}
+    try:
+        h = Harness(workdir)
+        steps = []
+        for name in only:
+            if name == "startup":
+                steps.append((name, lambda: bench_startup(h, args.repeat, args.budget)))
+            elif name == "refresh_wallet":
+                steps += [(name, lambda a=a: bench_refresh_wallet(h, a, args.repeat, args.latency)) for a in assets]
+            else:
+                fn = globals()[f"bench_{name}"]
+                steps += [(name, lambda n=n, fn=fn: fn(h, n, args.repeat)) for n in sizes]
+        for name, step in steps:
+            for key, times in step().items():
+                results[key] = {"median_ms": statistics.median(times), "min_ms": min(times), "runs": len(times)}
+                print(f"{key:<36} {results[key]['median_ms']:>10.2f} ms  (min {results[key]['min_ms']:.2f}, n={len(times)})",
+                      flush=True)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results, h.failures
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def find_baseline(history, commit=None):
+    if commit:
+        matches = [run for run in history if (run.get("commit") or "").startswith(commit)]
+        return matches[-1] if matches else None
+    return history[-1] if history else None
+
+
+def compare(results, baseline, threshold=THRESHOLD, noise_ms=NOISE_MS):
+    # [(name, baseline ms, current ms, relative change, regressed)]
+    rows = []
+    for name, current in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        before, now = base["median_ms"], current["median_ms"]
+        change = (now - before) / before if before else 0.0
+        rows.append((name, before, now, change, change > threshold and now - before > noise_ms))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the finance tracker's hot paths headlessly.")
+    parser.add_argument("--only", help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--sizes", help="ledger sizes (default 1000,100000,1000000)")
+    parser.add_argument("--assets", help="wallet sizes for refresh_wallet (default 10,100,500)")
+    parser.add_argument("--quick", action="store_true", help="skip the largest ledger and wallet sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=MOCK_LATENCY, help="mock server latency per request (s)")
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--baseline", help="commit to compare against (default: the last saved run)")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_MS, help="time-to-first-paint budget (ms)")
+    parser.add_argument("--save", action="store_true", help="append this run to the history")
+    args = parser.parse_args(argv)
+
+    history_path = os.path.abspath(args.history)
+    results, failures = run(args)
+    history = load_history(history_path)
+    baseline = find_baseline(history, args.baseline)
+    regressions = []
+    if baseline is not None:
+        print(f"\nCompared with {baseline.get('commit') or 'unknown commit'} ({baseline['date']}):")
+        for name, before, now, change, regressed in compare(results, baseline, args.threshold):
+            flag = "REGRESSION" if regressed else ""
+            print(f"{name:<36} {before:>10.2f} -> {now:>10.2f} ms  {change:+7.1%}  {flag}")
+            if regressed:
+                regressions.append(name)
+    elif args.baseline:
+        print(f"\nNo saved run for commit {args.baseline}")
+
+    if args.save:
+        history.append({
+            "commit": git_commit(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        })
+        tmp_path = history_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(history, f, indent=2)
+        os.replace(tmp_path, history_path)
+        print(f"Saved to {args.history}")
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return 1 if regressions or failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,405 @@
+# binance_client.py
+# Contains the Binance and FX HTTP client used by the wallet dashboard (no Qt)
+
+import hashlib
+import hmac
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeout
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from price_cache import PRICE_CACHE
+from tracing import TRACER
+
+# Both can point at a local mock server (see mock_binance.py)
+BINANCE_URL = os.environ.get("BINANCE_BASE_URL", "https://api.binance.com")
+FX_URL = os.environ.get("FX_URL", "https://api.exchangerate.host/latest?base=USD&symbols=AED")
+USD_TO_AED = 3.67
+QUOTE_ASSET = "USDT"
+REQUEST_TIMEOUT = 10
+MAX_WORKERS = 8
+# A background refresh gives up after this many seconds in total
+REFRESH_TIMEOUT = 30
+# Prices come from one bulk request and are shown this many rows at a time
+TICKER_CHUNK = 10
+# Most recent request timings kept for reporting
+TIMING_HISTORY = 200
+
+
+class BinanceError(Exception):
+    pass
+
+
+# Binance's error code for a symbol it doesn't list
+INVALID_SYMBOL = -1121
+
+
+def is_invalid_symbol(resp):
+    # The only failure that means "no such symbol" rather than "try later"
+    if resp.status_code != 400:
+        return False
+    try:
+        return resp.json().get("code") == INVALID_SYMBOL
+    except ValueError:
+        return False
+
+
+class BinanceClient:
+    # One pooled session per client. Tickers come from a single bulk
+    # ticker/24hr call; if Binance rejects the batch for an unknown symbol
+    # (which fails the whole request) they are fetched per symbol on a bounded
+    # thread pool. Rate limits and server errors raise instead.
+    # Prices and the FX rate go through a PriceCache (the process-wide one
+    # unless given; pass cache=None to always hit the network).
+
+    def __init__(self, api_key=None, api_secret=None, base_url=None, fx_url=None,
+                 timeout=REQUEST_TIMEOUT, max_workers=MAX_WORKERS, session=None, cache=PRICE_CACHE):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.base_url = (base_url or BINANCE_URL).rstrip("/")
+        self.fx_url = fx_url or FX_URL
+        self.timeout = timeout
+        self.max_workers = max_workers
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self.cache = cache
+        self.timings = deque(maxlen=TIMING_HISTORY)
+        self.request_count = 0
+        self._timings_lock = threading.Lock()
+
+    def close(self):
+        self.session.close()
+
+    def _get(self, url, params=None, headers=None, label=None):
+        started = time.perf_counter()
+        status = None
+        try:
+            with TRACER.span(f"http {label or url}"):
+                resp = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+            status = resp.status_code
+            return resp
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._timings_lock:
+                self.request_count += 1
+                self.timings.append({"request": label or url, "ms": elapsed, "status": status})
+
+    def _signed_params(self, api_secret, params=None):
+        params = dict(params or {})
+        params["timestamp"] = int(time.time() * 1000)
+        query = urlencode(params)
+        params["signature"] = hmac.new(api_secret.encode(), query.encode(), hashlib.sha256).hexdigest()
+        return params
+
+    def account(self, api_key=None, api_secret=None):
+        # Another wallet's keys can be passed to reuse this client's session
+        api_key = api_key or self.api_key
+        resp = self._get(f"{self.base_url}/api/v3/account", params=self._signed_params(api_secret or self.api_secret),
+                         headers={"X-MBX-APIKEY": api_key}, label="account")
+        if resp.status_code != 200:
+            raise BinanceError(f"Failed to fetch wallet: {resp.text}")
+        return resp.json()
+
+    def balances(self, api_key=None, api_secret=None):
+        # Assets with a non-zero free or locked amount, as {asset: total}
+        totals = {}
+        for b in self.account(api_key, api_secret).get("balances", []):
+            total = float(b["free"]) + float(b["locked"])
+            if total > 0:
+                totals[b["asset"]] = total
+        return totals
+
+    def ticker(self, symbol):
+        # None for an unknown symbol; rate limits and server errors raise, so
+        # the cache keeps serving the last price instead of forgetting it
+        resp = self._get(f"{self.base_url}/api/v3/ticker/24hr", params={"symbol": symbol}, label=f"ticker {symbol}")
+        if resp.status_code == 200:
+            return resp.json()
+        if is_invalid_symbol(resp):
+            return None
+        raise BinanceError(f"Ticker request for {symbol} failed: {resp.status_code}")
+
+    def tickers(self, symbols):
+        # {symbol: ticker dict}; symbols Binance doesn't know are left out
+        symbols = sorted(set(symbols))
+        if self.cache is None:
+            return self.fetch_tickers(symbols)
+        cached = self.cache.get_many("ticker", symbols, self.fetch_tickers)
+        return {symbol: t for symbol, t in cached.items() if t is not None}
+
+    def fetch_tickers(self, symbols):
+        if not symbols:
+            return {}
+        resp = self._get(f"{self.base_url}/api/v3/ticker/24hr",
+                         params={"symbols": json.dumps(symbols, separators=(",", ":"))},
+                         label=f"tickers x{len(symbols)}")
+        if resp.status_code == 200:
+            return {t["symbol"]: t for t in resp.json()}
+        if not is_invalid_symbol(resp):
+            # Fanning out per symbol would only multiply a rate limit
+            raise BinanceError(f"Ticker request failed: {resp.status_code}")
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(symbols))) as pool:
+            results = pool.map(self.ticker, symbols)
+            return {symbol: t for symbol, t in zip(symbols, results) if t is not None}
+
+    def fetch_usd_to_aed(self):
+        resp = self._get(self.fx_url, label="fx USD/AED")
+        if resp.status_code != 200:
+            raise BinanceError(f"FX rate request failed: {resp.status_code}")
+        return float(resp.json()["rates"]["AED"])
+
+    def usd_to_aed(self):
+        # Falls back to the pegged rate when no rate can be fetched or cached
+        try:
+            if self.cache is None:
+                return self.fetch_usd_to_aed()
+            return self.cache.get("fx", "USD/AED", self.fetch_usd_to_aed)
+        except Exception:
+            return USD_TO_AED
+
+    def fetch_wallet(self):
+        # Account and FX rate in parallel, then one round for all tickers.
+        # Returns (rows, summary) ready for the wallet table; summary["timings"]
+        # covers the requests this fetch made.
+        first_request = self.request_count
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            fx = pool.submit(self.usd_to_aed)
+            balances = self.balances()
+            usd_to_aed = fx.result()
+        symbols = [asset + QUOTE_ASSET for asset in balances if asset != QUOTE_ASSET]
+        rows, summary = wallet_rows(balances, self.tickers(symbols), usd_to_aed)
+        summary["timings"] = self.timing_summary(last=self.request_count - first_request)
+        summary["elapsed_ms"] = (time.perf_counter() - started) * 1000
+        return rows, summary
+
+    def timing_summary(self, last=None):
+        with self._timings_lock:
+            timings = list(self.timings)[-last:] if last else list(self.timings)
+        if not timings:
+            return {"requests": 0, "total_ms": 0.0, "max_ms": 0.0, "slowest": None}
+        slowest = max(timings, key=lambda t: t["ms"])
+        return {
+            "requests": len(timings),
+            "total_ms": sum(t["ms"] for t in timings),
+            "max_ms": slowest["ms"],
+            "slowest": slowest["request"],
+        }
+
+
+def wallet_row(asset, total, ticker, usd_to_aed):
+    # One row keyed like models.WALLET_COLUMNS
+    if asset == QUOTE_ASSET:
+        price, daily_pnl = 1.0, 0.0
+    else:
+        ticker = ticker or {}
+        price = float(ticker.get("lastPrice", 0))
+        daily_pnl = float(ticker.get("priceChangePercent", 0))
+    price_aed = price * usd_to_aed
+    return {
+        "asset": asset, "total": total, "price": price,
+        "price_aed": price_aed, "pnl": daily_pnl, "value": total * price_aed
+    }
+
+
+def merge_balances(per_wallet):
+    # {wallet: {asset: total}} -> ({asset: combined total}, {asset: {wallet: total}}),
+    # assets in the order they first appear
+    totals = {}
+    breakdown = {}
+    for name, balances in per_wallet.items():
+        for asset, total in balances.items():
+            totals[asset] = totals.get(asset, 0.0) + total
+            breakdown.setdefault(asset, {})[name] = total
+    return totals, breakdown
+
+
+def wallet_summary(rows, usd_to_aed):
+    # Totals over the rows that have been priced so far; rows merged from
+    # several wallets also give each wallet's own AED value
+    priced = [row for row in rows if "value" in row]
+    summary = {
+        "total_aed": sum(row["value"] for row in priced),
+        "avg_pnl": sum(row["pnl"] for row in priced) / len(priced) if priced else 0.0,
+        "usd_to_aed": usd_to_aed,
+        "priced": len(priced),
+        "assets": len(rows),
+    }
+    if rows and "breakdown" in rows[0]:
+        wallets = {}
+        for row in priced:
+            for name, total in row["breakdown"].items():
+                wallets[name] = wallets.get(name, 0.0) + total * row["price_aed"]
+        summary["wallets"] = wallets
+    return summary
+
+
+def wallet_rows(balances, tickers, usd_to_aed):
+    # Rows keyed like models.WALLET_COLUMNS plus the wallet totals
+    rows = [wallet_row(asset, total, tickers.get(asset + QUOTE_ASSET), usd_to_aed)
+            for asset, total in balances.items()]
+    return rows, wallet_summary(rows, usd_to_aed)
+
+
+class WalletRefresh:
+    # One wallet fetch on a background thread. Results are queued as events
+    # for the GUI to drain with poll():
+    #   ("balances", rows)    rows with asset and total only (plus a per-wallet
+    #                         "breakdown" when several wallets are merged)
+    #   ("prices", updates)   {row index: full row}, a chunk of rows at a time
+    #   ("summary", summary)  running totals after every update
+    #   ("done", timings) or ("error", message)
+    # A cancelled refresh stops at the next step and emits nothing further;
+    # requests already in flight end within the client's request timeout.
+    # With wallets={name: {"api_key", "api_secret"}} every account is fetched
+    # concurrently over the client's session and holdings are merged by asset,
+    # so each symbol is priced once however many wallets hold it. Wallets
+    # that fail are listed in the summary's "failed" instead of aborting.
+    # A single wallet's keys are passed in the same way rather than set on
+    # the shared client, which a cancelled refresh may still be using.
+
+    def __init__(self, client, wallets=None, api_key=None, api_secret=None,
+                 timeout=REFRESH_TIMEOUT, chunk_size=TICKER_CHUNK):
+        self.client = client
+        self.wallets = wallets
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.events = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="wallet-refresh", daemon=True)
+        self.started = None
+
+    def start(self):
+        self.started = time.monotonic()
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def done(self):
+        return self.started is not None and not self._thread.is_alive()
+
+    def poll(self):
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _emit(self, kind, payload):
+        if not self._cancel.is_set():
+            self.events.put((kind, payload))
+
+    def _remaining(self):
+        remaining = self.timeout - (time.monotonic() - self.started)
+        if remaining <= 0:
+            raise FutureTimeout()
+        return remaining
+
+    def _run(self):
+        with TRACER.span("wallet_refresh"):
+            self._refresh()
+
+    def _refresh(self):
+        client = self.client
+        first_request = client.request_count
+        pool = ThreadPoolExecutor(max_workers=client.max_workers)
+        try:
+            fx = pool.submit(client.usd_to_aed)
+            failed = {}
+            if self.wallets is None:
+                balances = pool.submit(client.balances, self.api_key, self.api_secret).result(timeout=self._remaining())
+                rows = [{"asset": asset, "total": total} for asset, total in balances.items()]
+            else:
+                per_wallet = self._fetch_wallets(pool, failed)
+                if self._cancel.is_set():
+                    return
+                if failed and not per_wallet:
+                    raise BinanceError("; ".join(f"{name}: {error}" for name, error in failed.items()))
+                balances, breakdown = merge_balances(per_wallet)
+                rows = [{"asset": asset, "total": total, "breakdown": breakdown[asset]}
+                        for asset, total in balances.items()]
+            if self._cancel.is_set():
+                return
+            self._emit("balances", [dict(row) for row in rows])
+            usd_to_aed = fx.result(timeout=self._remaining())
+            index = {}
+            for i, row in enumerate(rows):
+                if row["asset"] == QUOTE_ASSET:
+                    rows[i] = dict(row, **wallet_row(QUOTE_ASSET, row["total"], None, usd_to_aed))
+                    self._emit("prices", {i: dict(rows[i])})
+                else:
+                    index[row["asset"] + QUOTE_ASSET] = i
+            symbols = list(index)
+            # One bulk request for every symbol; the rows are then handed
+            # over a chunk at a time so the table fills in without one
+            # large update
+            tickers = pool.submit(client.tickers, symbols).result(timeout=self._remaining()) if symbols else {}
+            chunks = [symbols[i:i + self.chunk_size] for i in range(0, len(symbols), self.chunk_size)]
+            for chunk in chunks:
+                if self._cancel.is_set():
+                    return
+                updates = {}
+                for symbol in chunk:
+                    i = index[symbol]
+                    rows[i] = dict(rows[i], **wallet_row(rows[i]["asset"], rows[i]["total"], tickers.get(symbol), usd_to_aed))
+                    updates[i] = dict(rows[i])
+                self._emit("prices", updates)
+                self._emit("summary", self._summary(rows, usd_to_aed, failed))
+            if not chunks:
+                self._emit("summary", self._summary(rows, usd_to_aed, failed))
+            timings = client.timing_summary(last=client.request_count - first_request)
+            timings["elapsed_ms"] = (time.monotonic() - self.started) * 1000
+            self._emit("done", timings)
+        except FutureTimeout:
+            self._emit("error", f"Timed out after {self.timeout} s")
+        except BinanceError as e:
+            self._emit("error", str(e))
+        except Exception as e:
+            self._emit("error", f"Error: {e}")
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch_wallets(self, pool, failed):
+        # {wallet: balances} in the order wallets were given
+        futures = {
+            pool.submit(self.client.balances, keys.get("api_key"), keys.get("api_secret")): name
+            for name, keys in self.wallets.items()
+        }
+        results = {}
+        for future in as_completed(futures, timeout=self._remaining()):
+            if self._cancel.is_set():
+                break
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                failed[name] = str(e)
+        return {name: results[name] for name in self.wallets if name in results}
+
+    def _summary(self, rows, usd_to_aed, failed):
+        summary = wallet_summary(rows, usd_to_aed)
+        if self.wallets is not None:
+            summary["failed"] = failed
+        return summary
@@ -1,39 +1,41 @@
 # binance_dashboard.py
 # Contains Binance wallet logic and dashboard UI
 
-import json
-import requests
-from PySide6.QtWidgets import QMessageBox, QTableWidgetItem
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-import os
+from PySide6.QtWidgets import QMessageBox
+from wallet_registry import WALLETS_FILE, get_registry
 
-WALLETS_FILE = "binance_wallets.json"
+def get_client(app):
+    # One pooled HTTP client per app, shared by every wallet
+    client = getattr(app, "binance_client", None)
+    if client is None:
+        # The network stack is only imported once a wallet is used
+        from binance_client import BinanceClient
+        client = app.binance_client = BinanceClient()
+    return client
+
+def get_wallets(app):
+    # The shared in-memory registry, watched for edits made outside the app
+    registry = get_registry(WALLETS_FILE)
+    if not getattr(app, "watching_wallets", False):
+        # One listener per window, however often this is called
+        registry.watch(lambda: update_wallet_combo(app))
+        app.watching_wallets = True
+    return registry
 
 def save_binance_wallet(app, name, api_key, api_secret):
-    wallets = load_all_wallets()
-    wallets[name] = {
-        "api_key": api_key,
-        "api_secret": api_secret
-    }
-    with open(WALLETS_FILE, "w") as f:
-        json.dump(wallets, f, indent=4)
+    get_wallets(app).save(name, api_key, api_secret)
     update_wallet_combo(app)
     QMessageBox.information(app, "Success", f"Wallet '{name}' saved.")
 
 def load_all_wallets():
-    if not os.path.exists(WALLETS_FILE):
-        return {}
-    with open(WALLETS_FILE, "r") as f:
-        return json.load(f)
+    return get_registry(WALLETS_FILE).all()
 
 def update_wallet_combo(app):
-    wallets = load_all_wallets()
     app.wallet_combo.clear()
-    app.wallet_combo.addItems(wallets.keys())
+    app.wallet_combo.addItems(get_wallets(app).names())
 
 def load_selected_wallet(app, name):
-    wallets = load_all_wallets()
-    wallet = wallets.get(name)
+    wallet = get_wallets(app).get(name)
     if wallet:
         app.api_key_input.setText(wallet["api_key"])
         app.api_secret_input.setText(wallet["api_secret"])
@@ -42,42 +44,23 @@ def load_selected_wallet(app, name):
 
 def refresh_wallet(app):
     name = app.wallet_combo.currentText()
-    wallets = load_all_wallets()
-    wallet = wallets.get(name)
+    wallet = get_wallets(app).get(name)
     if not wallet:
         QMessageBox.warning(app, "Error", "No wallet selected.")
         return
 
-    api_key = wallet["api_key"]
-    api_secret = wallet["api_secret"]
-
-    # Example: Get account info from Binance API (public endpoint for demonstration)
-    url = "https://api.binance.com/api/v3/account"
-    headers = {
-        "X-MBX-APIKEY": api_key
-    }
+    from binance_client import BinanceError
+    client = get_client(app)
     try:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            data = response.json()
-            balances = data.get("balances", [])
-            app.wallet_table.setRowCount(len(balances))
-            for i, bal in enumerate(balances):
-                asset_item = QTableWidgetItem(bal["asset"])
-                free_item = QTableWidgetItem(str(bal["free"]))
-                locked_item = QTableWidgetItem(str(bal["locked"]))
-                app.wallet_table.setItem(i, 0, asset_item)
-                app.wallet_table.setItem(i, 1, free_item)
-                app.wallet_table.setItem(i, 2, locked_item)
-            # Optionally update a chart
-            assets = [b["asset"] for b in balances]
-            values = [float(b["free"]) for b in balances]
-            app.figure.clear()
-            ax = app.figure.add_subplot(111)
-            ax.bar(assets, values)
-            ax.set_title("Asset Distribution")
-            app.canvas.draw()
-        else:
-            QMessageBox.warning(app, "API Error", f"Failed to fetch wallet data: {response.text}")
+        balances = client.balances(wallet["api_key"], wallet["api_secret"])
+        app.wallet_model.set_rows({"asset": asset, "total": total} for asset, total in balances.items())
+        # Optionally update a chart
+        app.figure.clear()
+        ax = app.figure.add_subplot(111)
+        ax.bar(list(balances), list(balances.values()))
+        ax.set_title("Asset Distribution")
+        app.canvas.draw()
+    except BinanceError as e:
+        QMessageBox.warning(app, "API Error", str(e))
     except Exception as e:
         QMessageBox.critical(app, "Error", str(e))
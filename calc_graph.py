@@ -0,0 +1,110 @@
+# calc_graph.py
+# Contains the dependency-tracked calculation graph behind the live savings preview (no Qt)
+
+from engine import INPUT_KEYS, INTEREST_RATE, debt_term, monthly_debt_payment, parse_amount, savings_pct
+
+
+class CalcGraph:
+    # Inputs are plain values set by name; derived nodes are functions of
+    # other nodes, computed when read and memoized. set() only marks the
+    # nodes downstream of the changed input dirty, and a dirty node whose
+    # arguments come back unchanged keeps its value without being recomputed,
+    # so an edit stops propagating as soon as it stops changing anything.
+
+    def __init__(self):
+        self._inputs = {}
+        self._nodes = {}
+        self._dependents = {}
+        self._values = {}
+        self._args = {}
+        self._dirty = set()
+        self.computed = 0
+
+    def input(self, name, value=None):
+        self._inputs[name] = value
+        self._dependents.setdefault(name, [])
+
+    def node(self, name, deps, fn):
+        self._nodes[name] = (fn, tuple(deps))
+        self._dependents.setdefault(name, [])
+        for dep in deps:
+            self._dependents[dep].append(name)
+        self._dirty.add(name)
+
+    def set(self, name, value):
+        # Returns whether the input changed
+        if self._inputs[name] == value:
+            return False
+        self._inputs[name] = value
+        stack = list(self._dependents[name])
+        while stack:
+            node = stack.pop()
+            if node not in self._dirty:
+                self._dirty.add(node)
+                stack.extend(self._dependents[node])
+        return True
+
+    def get(self, name):
+        if name in self._inputs:
+            return self._inputs[name]
+        if name not in self._dirty:
+            return self._values[name]
+        fn, deps = self._nodes[name]
+        args = tuple(self.get(dep) for dep in deps)
+        if name not in self._args or self._args[name] != args:
+            # Errors propagate to the reader and leave the node dirty
+            self._values[name] = fn(*args)
+            self._args[name] = args
+            self.computed += 1
+        self._dirty.discard(name)
+        return self._values[name]
+
+    def is_dirty(self, name):
+        return name in self._dirty
+
+
+# Graph node names for the parsed form amounts, in INPUT_KEYS order
+AMOUNT_NODES = ["salary", "phone", "petrol", "annual_rent", "living", "debt_amt"]
+
+
+class MonthCalc(CalcGraph):
+    # engine.calculate_month as a graph over the form's raw field texts, so
+    # editing Phone Bill re-parses one field and re-adds the expenses, but
+    # leaves the rent and the amortized debt payment alone. entry() gives the
+    # same result as calculate_month for the same inputs.
+
+    def __init__(self, debt_type="personal"):
+        super().__init__()
+        for key, name in zip(INPUT_KEYS, AMOUNT_NODES):
+            self.input(key, "")
+            self.node(name, [key], lambda text: parse_amount(text, 0))
+        self.input("Debt Type", debt_type)
+        self.node("term", ["Debt Type"], debt_term)
+        self.node("monthly_rent", ["annual_rent"], lambda annual_rent: annual_rent / 12)
+        self.node("monthly_debt", ["debt_amt", "term"], monthly_debt_payment)
+        self.node("total_expenses", ["phone", "petrol", "monthly_rent", "living", "monthly_debt"],
+                  lambda phone, petrol, rent, living, debt: phone + petrol + rent + living + debt)
+        self.node("remaining", ["salary", "total_expenses"], lambda salary, expenses: salary - expenses)
+        self.node("savings_pct", ["salary", "total_expenses"], savings_pct)
+        self.node("savings", ["remaining", "savings_pct"], lambda remaining, pct: remaining * (pct / 100) if pct > 0 else 0)
+        self.node("investable", ["remaining", "savings"], lambda remaining, savings: remaining - savings)
+
+    def set_fields(self, texts, debt_type):
+        # texts: {field name: text}; returns whether anything changed
+        changed = [self.set(key, texts[key]) for key in INPUT_KEYS]
+        return self.set("Debt Type", debt_type) or any(changed)
+
+    def entry(self, month):
+        # (entry, savings %) as calculate_month returns them
+        amounts = [self.get(name) for name in AMOUNT_NODES]
+        _, phone, petrol, annual_rent, living, debt_amt = amounts
+        entry = {
+            "Month": month,
+            "Salary": amounts[0],
+            "Expenses": self.get("total_expenses"),
+            "Savings": self.get("savings"),
+            "Invested": self.get("investable"),
+            "Debt Type": self.get("Debt Type"),
+            "Inputs": [phone, petrol, annual_rent, living, debt_amt, self.get("term"), INTEREST_RATE]
+        }
+        return entry, self.get("savings_pct")
@@ -0,0 +1,168 @@
+# charts.py
+# Contains persistent matplotlib views that update in place
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+
+
+def downsample_minmax(x, y, buckets):
+    # Keep the min and max of each bucket (in original order) so spikes
+    # survive; the result has at most 2 * buckets points
+    n = len(y)
+    if buckets <= 0 or n <= 2 * buckets:
+        return x, y
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    starts = edges[:-1]
+    # fmin/fmax skip NaN, so a gap doesn't hide the bucket's real extremes
+    lo = np.fmin.reduceat(y, starts)
+    hi = np.fmax.reduceat(y, starts)
+    # Positions of those extremes inside each bucket
+    bucket_of = np.repeat(np.arange(buckets), np.diff(edges))
+    is_lo = y == lo[bucket_of]
+    is_hi = y == hi[bucket_of]
+    first_lo = np.full(buckets, n)
+    first_hi = np.full(buckets, n)
+    np.minimum.at(first_lo, bucket_of[is_lo], np.nonzero(is_lo)[0])
+    np.minimum.at(first_hi, bucket_of[is_hi], np.nonzero(is_hi)[0])
+    # An all-NaN bucket matches nothing: keep its first point so the line
+    # still breaks there
+    first_lo = np.where(first_lo == n, starts, first_lo)
+    first_hi = np.where(first_hi == n, starts, first_hi)
+    keep = np.unique(np.concatenate([first_lo, first_hi]))
+    return x[keep], y[keep]
+
+
+class LineChart:
+    # One figure and canvas for the lifetime of a view. Lines are animated
+    # artists: when new data fits the current axes only the lines are
+    # re-rendered over a cached background (blitting); otherwise the axes
+    # are rescaled and the canvas redrawn once. Other plot kinds can take
+    # over the figure through begin_custom().
+
+    def __init__(self, title="", xlabel="", ylabel="", figsize=(6, 4)):
+        # Qt is only needed for the live views; report.py shares the
+        # downsampling without it
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        self.figure = Figure(figsize=figsize)
+        self.canvas = FigureCanvas(self.figure)
+        self.title = title
+        self.xlabel = xlabel
+        self.ylabel = ylabel
+        self.lines = {}
+        self.ax = None
+        self._background = None
+        self._labels = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _setup_axes(self):
+        self.figure.clear()
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_title(self.title)
+        self.ax.set_xlabel(self.xlabel)
+        self.ax.set_ylabel(self.ylabel)
+        self.ax.grid(True)
+        self.ax.xaxis.set_major_locator(MaxNLocator(nbins=12, integer=True))
+        self.ax.xaxis.set_major_formatter(FuncFormatter(self._format_x))
+        self.lines = {}
+        self._background = None
+
+    def set_title(self, title):
+        self.title = title
+        if self.ax is not None and self.ax.get_title() != title:
+            self.ax.set_title(title)
+            # The cached background still has the old title
+            self._background = None
+
+    def _format_x(self, value, _pos):
+        if self._labels is None:
+            return f"{value:g}"
+        i = int(round(value))
+        return self._labels[i] if 0 <= i < len(self._labels) else ""
+
+    def _buckets(self):
+        # One min/max pair per horizontal pixel of the axes
+        return max(1, int(self.ax.bbox.width)) if self.ax is not None else 0
+
+    def set_series(self, x, series, styles=None, labels=None, legend=None):
+        # series: {name: y values}; labels: optional x tick labels;
+        # legend: optional {name: legend text}, defaults to the name
+        styles = styles or {}
+        legend = legend or {}
+        rebuild = self.ax is None or set(series) != set(self.lines)
+        if rebuild:
+            self._setup_axes()
+        if rebuild and labels is not None:
+            self.ax.tick_params(axis="x", labelrotation=45)
+        self._labels = labels
+        x = np.asarray(x)
+        buckets = self._buckets()
+        ymin, ymax = np.inf, -np.inf
+        for name, y in series.items():
+            y = np.asarray(y, dtype=float)
+            finite = y[np.isfinite(y)]
+            if len(finite):
+                ymin, ymax = min(ymin, float(finite.min())), max(ymax, float(finite.max()))
+            xs, ys = downsample_minmax(x, y, buckets)
+            if rebuild:
+                (self.lines[name],) = self.ax.plot(xs, ys, label=name, animated=True, **styles.get(name, {}))
+            else:
+                self.lines[name].set_data(xs, ys)
+        texts = [legend.get(name, name) for name in self.lines]
+        if rebuild:
+            self.ax.legend(self.lines.values(), texts, loc="upper left")
+        else:
+            legend_texts = self.ax.get_legend().get_texts()
+            if [t.get_text() for t in legend_texts] != texts:
+                for artist, text in zip(legend_texts, texts):
+                    artist.set_text(text)
+                rebuild = True
+        if not len(x):
+            self.redraw()
+            return
+        if ymin > ymax:
+            # Nothing finite to scale to
+            ymin, ymax = 0.0, 0.0
+        pad = (ymax - ymin) * 0.05 or 1.0
+        xlim = (float(x[0]), float(x[-1]) if len(x) > 1 else float(x[0]) + 1)
+        ylim = (ymin - pad, ymax + pad)
+        if rebuild or xlim != self.ax.get_xlim() or not self._fits(ylim):
+            self.ax.set_xlim(*xlim)
+            self.ax.set_ylim(*ylim)
+            self.redraw()
+        else:
+            self.blit()
+
+    def _fits(self, ylim):
+        # Reuse the current axes unless the data left them or shrank a lot
+        low, high = self.ax.get_ylim()
+        inside = low <= ylim[0] and ylim[1] <= high
+        return inside and (ylim[1] - ylim[0]) >= 0.5 * (high - low)
+
+    def begin_custom(self):
+        # Hand the figure to a one-off plot; lines are rebuilt on next use
+        self.figure.clear()
+        self.ax = None
+        self.lines = {}
+        self._background = None
+        return self.figure.add_subplot(111)
+
+    def redraw(self):
+        self.figure.tight_layout()
+        self.canvas.draw_idle()
+
+    def _on_draw(self, _event):
+        if self.ax is None or not self.lines:
+            return
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for line in self.lines.values():
+            self.ax.draw_artist(line)
+
+    def blit(self):
+        if self._background is None:
+            self.redraw()
+            return
+        self.canvas.restore_region(self._background)
+        for line in self.lines.values():
+            self.ax.draw_artist(line)
+        self.canvas.blit(self.figure.bbox)
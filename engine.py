@@ -0,0 +1,116 @@
+# engine.py
+# Contains the pure-Python monthly finance calculations (no Qt required)
+
+import math
+import sys
+from functools import lru_cache
+
+INTEREST_RATE = 7.49 / 100
+DEBT_TERMS = {"personal": 4, "housing": 25}
+
+# Form field names, in the order the calculation takes them
+INPUT_KEYS = ["Salary", "Phone Bill", "Petrol Money", "Annual Rent", "Living Expenses", "Debt Amount"]
+
+
+def debt_term(debt_type):
+    return DEBT_TERMS.get(debt_type, DEBT_TERMS["personal"])
+
+
+@lru_cache(maxsize=1024)
+def payment_factor(interest_rate, term_years):
+    # Payment per unit borrowed; only a handful of (rate, term) pairs are used
+    months = term_years * 12
+    if months <= 0:
+        return 0.0
+    monthly_interest = interest_rate / 12
+    if monthly_interest > 0:
+        growth = (1 + monthly_interest) ** months
+        return monthly_interest * growth / (growth - 1)
+    return 1 / months
+
+
+def monthly_debt_payment(debt_amt, term_years, interest_rate=INTEREST_RATE):
+    # Standard amortized payment for a fixed-rate loan
+    return debt_amt * payment_factor(interest_rate, term_years)
+
+
+def savings_pct(salary, total_expenses):
+    remaining = salary - total_expenses
+    return (remaining / salary * 100) if salary > 0 else 0
+
+
+def calculate_month(month, salary, phone, petrol, annual_rent, living, debt_amt, debt_type="personal"):
+    # Returns (entry, savings %) where entry is what the ledger stores
+    term = debt_term(debt_type)
+    monthly_rent = annual_rent / 12
+    monthly_debt = monthly_debt_payment(debt_amt, term)
+    total_expenses = phone + petrol + monthly_rent + living + monthly_debt
+    remaining = salary - total_expenses
+    pct = savings_pct(salary, total_expenses)
+    savings = remaining * (pct / 100) if pct > 0 else 0
+    investable = remaining - savings
+    entry = {
+        "Month": month,
+        "Salary": salary,
+        "Expenses": total_expenses,
+        "Savings": savings,
+        "Invested": investable,
+        "Debt Type": debt_type,
+        "Inputs": [phone, petrol, annual_rent, living, debt_amt, term, INTEREST_RATE]
+    }
+    return entry, pct
+
+
+def parse_amount(value, default=None):
+    if value is None or value == "":
+        if default is None:
+            raise ValueError("missing value")
+        return default
+    amount = float(value)
+    if not math.isfinite(amount):
+        raise ValueError(f"not a finite amount: {value!r}")
+    return amount
+
+
+def calculate_record(record):
+    # A record is a mapping with the form's field names, e.g. a CSV row
+    if not isinstance(record, dict):
+        raise ValueError(f"expected an object, got {type(record).__name__}")
+    values = [parse_amount(record.get(key)) for key in INPUT_KEYS]
+    debt_type = record.get("Debt Type") or "personal"
+    if not isinstance(debt_type, str) or debt_type.strip().lower() not in DEBT_TERMS:
+        raise ValueError(f"unknown debt type {debt_type!r}")
+    debt_type = debt_type.strip().lower()
+    return calculate_month(record.get("Month", ""), *values, debt_type=debt_type)[0]
+
+
+def iter_records(path):
+    # Stream input records from a CSV file or a JSON array
+    if path.lower().endswith(".csv"):
+        import csv
+        with open(path, newline="") as f:
+            yield from csv.DictReader(f)
+    else:
+        from ledger_store import iter_json_entries
+        yield from iter_json_entries(path)
+
+
+def run_batch(input_path, output_path):
+    # Writes the calculated entries as a JSON array, one record at a time
+    import json
+    count = 0
+    errors = 0
+    with open(output_path, "w") as out:
+        out.write("[")
+        for line_no, record in enumerate(iter_records(input_path), 1):
+            try:
+                entry = calculate_record(record)
+            except (ValueError, TypeError) as e:
+                errors += 1
+                print(f"{input_path}: record {line_no}: {e}", file=sys.stderr)
+                continue
+            out.write(",\n" if count else "\n")
+            json.dump(entry, out)
+            count += 1
+        out.write("\n]\n")
+    return count, errors
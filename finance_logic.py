@@ -1,31 +1,59 @@
 # finance_logic.py
 # Contains finance calculations and data management
+# Qt is imported inside the UI helpers so the data functions run headless
 
 import json
 import os
-from PySide6.QtWidgets import QMessageBox, QTableWidgetItem
+from ledger_store import TRANSACTION_SCHEMA, open_store
+from ledger import Ledger, TRANSACTION_FIELDS
 
 DATA_FILE = "finance_data.json"
+# Set FINANCE_STORE=sqlite to keep transactions in an indexed SQLite table
+# (finance_data.db, next to DATA_FILE)
+USE_SQLITE = os.environ.get("FINANCE_STORE") == "sqlite"
+
+def get_store(app):
+    store = getattr(app, "store", None)
+    if store is None and USE_SQLITE:
+        store = app.store = open_store(DATA_FILE, backend="sqlite", schema=TRANSACTION_SCHEMA)
+    return store
 
 def load_data(app):
-    if os.path.exists(DATA_FILE):
+    store = get_store(app)
+    if store is not None:
+        entries = store.load()
+    elif os.path.exists(DATA_FILE):
         with open(DATA_FILE, "r") as f:
-            app.data = json.load(f)
+            entries = json.load(f)
     else:
-        app.data = []
+        entries = []
+    app.data = Ledger.from_entries(entries, TRANSACTION_FIELDS)
     app.tableWidget.setRowCount(0)
     for entry in app.data:
         add_table_row(app, entry)
 
 def save_data(app):
+    store = get_store(app)
+    if store is not None:
+        store.save(app.data)
+        return
     with open(DATA_FILE, "w") as f:
-        json.dump(app.data, f, indent=4)
+        json.dump(app.data.to_entries(), f, indent=4)
+
+def export_json(app, path=DATA_FILE):
+    store = get_store(app)
+    if store is not None:
+        store.export_json(path)
+    else:
+        with open(path, "w") as f:
+            json.dump(app.data.to_entries(), f, indent=4)
 
 def clear_database(app):
+    from PySide6.QtWidgets import QMessageBox
     reply = QMessageBox.question(app, "Clear Database", "Are you sure you want to clear all data?",
                                  QMessageBox.Yes | QMessageBox.No)
     if reply == QMessageBox.Yes:
-        app.data = []
+        app.data.clear()
         app.tableWidget.setRowCount(0)
         save_data(app)
 
@@ -38,10 +66,15 @@ def add_data(app):
     }
     app.data.append(entry)
     add_table_row(app, entry)
-    save_data(app)
+    store = get_store(app)
+    if store is not None:
+        store.append(entry)
+    else:
+        save_data(app)
     update_savings_pct(app)
 
 def add_table_row(app, d):
+    from PySide6.QtWidgets import QTableWidgetItem
     row = app.tableWidget.rowCount()
     app.tableWidget.insertRow(row)
     app.tableWidget.setItem(row, 0, QTableWidgetItem(d["date"]))
@@ -50,12 +83,18 @@ def add_table_row(app, d):
     app.tableWidget.setItem(row, 3, QTableWidgetItem(d["category"]))
 
 def update_savings_pct(app):
-    total = sum(entry["amount"] for entry in app.data)
-    savings = sum(entry["amount"] for entry in app.data if entry["category"].lower() == "savings")
+    store = get_store(app)
+    if store is not None:
+        totals = store.category_totals()
+    else:
+        totals = app.data.category_totals("amount")
+    total = sum(totals.values())
+    savings = sum(v for k, v in totals.items() if k and k.lower() == "savings")
     pct = (savings / total * 100) if total > 0 else 0
     app.savingsLabel.setText(f"Savings: {pct:.2f}%")
 
 def show_logs(app):
+    from PySide6.QtWidgets import QMessageBox
     logs = "\n".join([f"{e['date']}: {e['description']} - {e['amount']} ({e['category']})" for e in app.data])
     QMessageBox.information(app, "Logs", logs if logs else "No logs available.")
 
@@ -64,17 +103,24 @@ def delete_entry(app):
     if row >= 0:
         app.tableWidget.removeRow(row)
         del app.data[row]
-        save_data(app)
+        store = get_store(app)
+        if store is not None:
+            store.delete(row)
+        else:
+            save_data(app)
         update_savings_pct(app)
 
 def show_chart(app):
+    from PySide6.QtWidgets import QMessageBox
     # Placeholder for chart logic
     QMessageBox.information(app, "Chart", "Chart functionality not implemented.")
 
 def show_growth_graph(app):
+    from PySide6.QtWidgets import QMessageBox
     # Placeholder for growth graph logic
     QMessageBox.information(app, "Growth Graph", "Growth graph functionality not implemented.")
 
 def export_pdf(app):
+    from PySide6.QtWidgets import QMessageBox
     # Placeholder for PDF export logic
     QMessageBox.information(app, "Export PDF", "PDF export functionality not implemented.")
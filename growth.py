@@ -0,0 +1,186 @@
+# growth.py
+# Contains investment growth projections: deterministic series, CAGR x period
+# sweeps and Monte Carlo simulation of monthly returns
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from tracing import TRACER
+
+PATH_CHUNK = 5000
+SAMPLE_POINTS = 60
+# Horizons at least this long are worth spreading over a process pool
+POOL_MIN_MONTHS = 240
+
+
+def contribution_schedule(invested_monthly, period):
+    # Ledger contributions for the first `period` months, zero afterwards
+    contributions = np.zeros(period)
+    n = min(period, len(invested_monthly))
+    contributions[:n] = invested_monthly[:n]
+    return contributions
+
+
+def growth_series(contributions, cagrs):
+    # Portfolio value after each month when every month grows by
+    # 1 + cagr / 12 after that month's contribution. With F = cumprod(rate),
+    # the value after month m is F_m * cumsum(c_k * rate / F_k).
+    # A scalar cagr gives shape (period,), an array gives (len(cagrs), period).
+    rates = 1 + np.atleast_1d(np.asarray(cagrs, dtype=float)) / 12
+    period = len(contributions)
+    factors = np.cumprod(np.broadcast_to(rates[:, None], (len(rates), period)), axis=1)
+    series = factors * np.cumsum(contributions * rates[:, None] / factors, axis=1)
+    return series[0] if np.ndim(cagrs) == 0 else series
+
+
+def sweep(invested_monthly, cagrs, periods):
+    # Final values for every (cagr, period) pair in one pass over the longest
+    # horizon; returns a (len(cagrs), len(periods)) grid
+    periods = np.asarray(periods, dtype=int)
+    contributions = contribution_schedule(invested_monthly, int(periods.max()))
+    series = growth_series(contributions, np.asarray(cagrs, dtype=float))
+    return series[:, periods - 1]
+
+
+class SeriesCache:
+    # Small LRU for computed growth results, keyed by whatever the caller
+    # passes; include the ledger version so edits invalidate naturally
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        if key in self._items:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key]
+        self.misses += 1
+        value = compute()
+        self._items[key] = value
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._items.clear()
+
+
+def sample_months(period, points=SAMPLE_POINTS):
+    # 1-based months at which paths are kept; always includes the last one
+    return np.unique(np.linspace(1, period, min(points, period)).round().astype(int))
+
+
+def _simulate_chunk(args):
+    contributions, cagr, volatility, n_paths, seed, sample_idx = args
+    rng = np.random.default_rng(seed)
+    period = len(contributions)
+    sigma = volatility / np.sqrt(12)
+    # Drift chosen so the expected monthly growth is 1 + cagr / 12, the same
+    # rate show_growth_graph compounds deterministically
+    mu = np.log1p(cagr / 12) - sigma ** 2 / 2
+    log_growth = rng.normal(mu, sigma, size=(n_paths, period))
+    # Value after month m is sum_k c_k * prod_{j=k..m} g_j, which with
+    # L = cumsum(log g) is exp(L_m) * cumsum(c_k * exp(-L_{k-1}))
+    cum = np.cumsum(log_growth, axis=1)
+    previous = np.concatenate([np.zeros((n_paths, 1)), cum[:, :-1]], axis=1)
+    values = np.exp(cum) * np.cumsum(contributions * np.exp(-previous), axis=1)
+    return values[:, sample_idx].astype(np.float32)
+
+
+def simulate(invested_monthly, cagr, period, volatility=0.15, n_paths=10000, seed=None,
+             chunk_size=PATH_CHUNK, processes=None, percentiles=(5, 50, 95), cancel=None):
+    # Runs n_paths return paths and returns percentile bands at sampled months.
+    # Paths are generated chunk by chunk, each from its own spawned seed, so
+    # results are identical whether chunks run serially or in a process pool.
+    # cancel: optional threading.Event checked between chunks; returns None
+    # once it is set.
+    if seed is None:
+        # Still reproducible: the seed used is returned with the results
+        seed = int(np.random.SeedSequence().entropy % 2 ** 32)
+    contributions = contribution_schedule(invested_monthly, period)
+    months = sample_months(period)
+    sample_idx = months - 1
+    sizes = [min(chunk_size, n_paths - start) for start in range(0, n_paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(contributions, cagr, volatility, size, s, sample_idx) for size, s in zip(sizes, seeds)]
+
+    sampled = np.empty((n_paths, len(months)), dtype=np.float32)
+    if processes and processes > 1 and period >= POOL_MIN_MONTHS and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        from multiprocessing import get_context
+        # Spawned, not forked: the caller is usually a worker thread of the
+        # GUI process, and forking a multi-threaded process is unsafe
+        with ProcessPoolExecutor(max_workers=processes, mp_context=get_context("spawn")) as pool:
+            results = pool.map(_simulate_chunk, jobs)
+            offset = 0
+            for block in results:
+                if cancel is not None and cancel.is_set():
+                    pool.shutdown(cancel_futures=True)
+                    return None
+                sampled[offset:offset + len(block)] = block
+                offset += len(block)
+    else:
+        offset = 0
+        for job in jobs:
+            if cancel is not None and cancel.is_set():
+                return None
+            block = _simulate_chunk(job)
+            sampled[offset:offset + len(block)] = block
+            offset += len(block)
+
+    bands = np.percentile(sampled, percentiles, axis=0)
+    return {
+        "months": months,
+        "invested": np.cumsum(contributions)[sample_idx],
+        "bands": dict(zip(percentiles, bands)),
+        "final": {p: float(b[-1]) for p, b in zip(percentiles, bands)},
+        "seed": seed,
+    }
+
+
+class SimulationJob:
+    # Runs simulate() on a background thread. The GUI polls done and then
+    # reads result or error; cancel() stops at the next chunk of paths and
+    # leaves result None.
+
+    def __init__(self, invested_monthly, cagr, period, **kwargs):
+        # Own copy, so ledger edits made while it runs don't race it
+        self.invested_monthly = np.array(invested_monthly, dtype=float)
+        self.cagr = cagr
+        self.period = period
+        self.kwargs = kwargs
+        self.result = None
+        self.error = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="growth-simulation", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def done(self):
+        return not self._thread.is_alive() and self._thread.ident is not None
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        return self.done
+
+    def _run(self):
+        try:
+            with TRACER.span("simulate"):
+                self.result = simulate(self.invested_monthly, self.cagr, self.period,
+                                       cancel=self._cancel, **self.kwargs)
+        except Exception as e:
+            self.error = str(e)
@@ -0,0 +1,410 @@
+# ledger.py
+# Contains the columnar, NumPy-backed ledger shared by the UI and logic
+
+import itertools
+import math
+from collections.abc import Mapping
+
+import numpy as np
+
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+MONTH_INDEX = {name: i + 1 for i, name in enumerate(MONTHS)}
+
+# Field layouts: (entry key, kind). Kinds map to storage as follows:
+#   float    -> float64 column
+#   int      -> int32 column (0 means "not set")
+#   month    -> int8 column holding 1-12, exposed as the month name
+#   category -> int32 ids into an interned list of names
+#   inputs   -> float64 matrix of the calculation inputs (INPUT_FIELDS)
+#   object   -> plain Python list, for free text
+LEDGER_FIELDS = [
+    ("Month", "month"),
+    ("Year", "int"),
+    ("Salary", "float"),
+    ("Expenses", "float"),
+    ("Savings", "float"),
+    ("Invested", "float"),
+    ("Category", "category"),
+    ("Debt Type", "category"),
+    ("Inputs", "inputs"),
+]
+
+# Packed order of the "Inputs" value stored with each month
+INPUT_FIELDS = [
+    "Phone Bill", "Petrol Money", "Annual Rent", "Living Expenses",
+    "Debt Amount", "Debt Term (years)", "Interest Rate"
+]
+
+TRANSACTION_FIELDS = [
+    ("date", "object"),
+    ("description", "object"),
+    ("amount", "float"),
+    ("category", "category"),
+]
+
+# Versions are unique across ledgers so caches can key on them alone
+_versions = itertools.count(1)
+
+_DTYPES = {"float": np.float64, "int": np.int32, "month": np.int8, "category": np.int32}
+
+
+def _new_column(kind, capacity):
+    if kind == "inputs":
+        return np.full((capacity, len(INPUT_FIELDS)), np.nan)
+    return np.zeros(capacity, dtype=_DTYPES[kind])
+
+
+class LogRecord:
+    # Calculation inputs and results for one month; the log text is
+    # rendered from these on demand instead of being stored per entry.
+    __slots__ = (
+        "month", "salary", "phone", "petrol", "annual_rent", "living", "debt_amt",
+        "debt_type", "term", "interest_rate", "expenses", "savings", "invested"
+    )
+
+    def __init__(self, month, salary, inputs, debt_type, expenses, savings, invested):
+        self.month = month
+        self.salary = salary
+        (self.phone, self.petrol, self.annual_rent, self.living,
+         self.debt_amt, self.term, self.interest_rate) = inputs
+        self.debt_type = debt_type
+        self.expenses = expenses
+        self.savings = savings
+        self.invested = invested
+
+    @staticmethod
+    def parse_text(log):
+        # Recover the packed inputs and debt type from a legacy "Log" string
+        values = {}
+        for line in log.splitlines():
+            key, sep, value = line.partition(": ")
+            if sep:
+                values[key] = value.strip()
+        inputs = []
+        for key in INPUT_FIELDS:
+            value = values.get(key, "0")
+            if key == "Interest Rate":
+                inputs.append(float(value.rstrip("%")) / 100)
+            else:
+                inputs.append(float(value))
+        return inputs, values.get("Debt Type")
+
+    def render(self):
+        monthly_rent = self.annual_rent / 12
+        monthly_debt = self.expenses - self.phone - self.petrol - monthly_rent - self.living
+        remaining = self.salary - self.expenses
+        savings_pct = (remaining / self.salary * 100) if self.salary > 0 else 0
+        return (
+            f"Month: {self.month}\n"
+            f"Salary: {self.salary:.2f}\n"
+            f"Phone Bill: {self.phone:.2f}\n"
+            f"Petrol Money: {self.petrol:.2f}\n"
+            f"Annual Rent: {self.annual_rent:.2f}\n"
+            f"Monthly Rent: {monthly_rent:.2f}\n"
+            f"Living Expenses: {self.living:.2f}\n"
+            f"Debt Amount: {self.debt_amt:.2f}\n"
+            f"Debt Type: {self.debt_type}\n"
+            f"Debt Term (years): {self.term:g}\n"
+            f"Interest Rate: {self.interest_rate*100:.2f}%\n"
+            f"Monthly Debt Payment: {monthly_debt:.2f}\n"
+            f"Total Expenses: {self.expenses:.2f}\n"
+            f"Remaining after Expenses: {remaining:.2f}\n"
+            f"Savings %: {savings_pct:.2f}\n"
+            f"Savings: {self.savings:.2f}\n"
+            f"Invested: {self.invested:.2f}\n"
+        )
+
+
+class RowView(Mapping):
+    # Read-only view of one ledger row; behaves like the old entry dict
+    __slots__ = ("_ledger", "_index")
+
+    def __init__(self, ledger, index):
+        self._ledger = ledger
+        self._index = index
+
+    def __getitem__(self, key):
+        value = self._ledger.value(self._index, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        for key, _ in self._ledger.fields:
+            if self._ledger.value(self._index, key) is not None:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"RowView({dict(self)!r})"
+
+
+class Ledger:
+    def __init__(self, fields=LEDGER_FIELDS, capacity=64):
+        self.fields = fields
+        self.kinds = dict(fields)
+        self._size = 0
+        self._capacity = capacity
+        self._columns = {}
+        for key, kind in fields:
+            if kind == "object":
+                self._columns[key] = []
+            else:
+                self._columns[key] = _new_column(kind, capacity)
+        self.categories = [None]
+        self._category_ids = {None: 0}
+        self.version = next(_versions)
+        # Running sums of every float column, overall and per category id,
+        # kept up to date on each append/delete
+        self._amount_keys = [key for key, kind in fields if kind == "float"]
+        self._category_keys = [key for key, kind in fields if kind == "category"]
+        self._totals = [0.0] * len(self._amount_keys)
+        self._category_sums = {key: {} for key in self._category_keys}
+
+    @classmethod
+    def from_entries(cls, entries, fields=LEDGER_FIELDS):
+        entries = list(entries)
+        ledger = cls(fields, capacity=max(64, len(entries)))
+        ledger.extend(entries)
+        return ledger
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        return RowView(self, index)
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield RowView(self, i)
+
+    def __delitem__(self, index):
+        self.delete(index)
+
+    # --- Mutation ---
+
+    def _grow(self, needed):
+        if needed <= self._capacity:
+            return
+        capacity = max(needed, self._capacity * 2)
+        for key, kind in self.fields:
+            if kind != "object":
+                column = _new_column(kind, capacity)
+                column[:self._size] = self._columns[key][:self._size]
+                self._columns[key] = column
+        self._capacity = capacity
+
+    def intern(self, name):
+        category_id = self._category_ids.get(name)
+        if category_id is None:
+            category_id = len(self.categories)
+            self.categories.append(name)
+            self._category_ids[name] = category_id
+        return category_id
+
+    def _encode(self, kind, value):
+        if kind == "month":
+            return MONTH_INDEX.get(value, 0)
+        if kind == "category":
+            return self.intern(value)
+        if kind == "int":
+            return int(value) if value is not None else 0
+        if kind == "float":
+            return float(value) if value is not None else 0.0
+        if kind == "inputs":
+            return value if value is not None else np.nan
+        return value
+
+    def append(self, entry):
+        if "Log" in entry and "Inputs" not in entry and "Inputs" in self.kinds:
+            # Migrate pre-structured entries that carry the rendered text
+            entry = dict(entry)
+            entry["Inputs"], entry["Debt Type"] = LogRecord.parse_text(entry.pop("Log"))
+        self._grow(self._size + 1)
+        i = self._size
+        for key, kind in self.fields:
+            value = self._encode(kind, entry.get(key))
+            if kind == "object":
+                self._columns[key].append(value)
+            else:
+                self._columns[key][i] = value
+        self._size += 1
+        self._update_aggregates(i, 1)
+        self.version = next(_versions)
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def delete(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        n = self._size
+        self._update_aggregates(index, -1)
+        for key, kind in self.fields:
+            column = self._columns[key]
+            if kind == "object":
+                del column[index]
+            else:
+                column[index:n - 1] = column[index + 1:n]
+        self._size -= 1
+        self.version = next(_versions)
+
+    def clear(self):
+        for key, kind in self.fields:
+            if kind == "object":
+                self._columns[key].clear()
+        self._size = 0
+        self._totals = [0.0] * len(self._amount_keys)
+        self._category_sums = {key: {} for key in self._category_keys}
+        self.version = next(_versions)
+
+    def copy(self):
+        clone = Ledger(self.fields, capacity=max(1, self._size))
+        for key, kind in self.fields:
+            if kind == "object":
+                clone._columns[key] = list(self._columns[key])
+            else:
+                clone._columns[key][:self._size] = self._columns[key][:self._size]
+        clone._size = self._size
+        clone.categories = list(self.categories)
+        clone._category_ids = dict(self._category_ids)
+        clone.version = self.version
+        clone._totals = list(self._totals)
+        clone._category_sums = {
+            key: {cid: list(sums) for cid, sums in by_id.items()}
+            for key, by_id in self._category_sums.items()
+        }
+        return clone
+
+    # --- Aggregates ---
+
+    def _update_aggregates(self, index, sign):
+        amounts = [float(self._columns[key][index]) for key in self._amount_keys]
+        totals = self._totals
+        for j, amount in enumerate(amounts):
+            totals[j] += sign * amount
+        for key in self._category_keys:
+            category_id = int(self._columns[key][index])
+            sums = self._category_sums[key].setdefault(category_id, [0.0] * len(amounts))
+            for j, amount in enumerate(amounts):
+                sums[j] += sign * amount
+
+    def total(self, key):
+        # O(1) running total of a float column
+        return self._totals[self._amount_keys.index(key)]
+
+    def totals(self):
+        return dict(zip(self._amount_keys, self._totals))
+
+    def _category_key(self, category_key):
+        # Defaults to the first category column ("Category" for LEDGER_FIELDS,
+        # "category" for TRANSACTION_FIELDS)
+        if category_key is not None:
+            return category_key
+        if not self._category_keys:
+            raise KeyError("ledger has no category column")
+        return self._category_keys[0]
+
+    def category_totals(self, key, category_key=None):
+        # O(categories) running totals of a float column per category name
+        category_key = self._category_key(category_key)
+        j = self._amount_keys.index(key)
+        return {
+            self.categories[cid]: sums[j]
+            for cid, sums in self._category_sums[category_key].items()
+            if self.categories[cid] is not None
+        }
+
+    def check_aggregates(self, rel_tol=1e-9, abs_tol=1e-6):
+        # Compare the running sums with a full recompute; returns mismatches
+        problems = []
+        for key in self._amount_keys:
+            expected = math.fsum(self.column(key))
+            if not math.isclose(self.total(key), expected, rel_tol=rel_tol, abs_tol=abs_tol):
+                problems.append(f"total {key}: {self.total(key)} != {expected}")
+            for category_key in self._category_keys:
+                running = self.category_totals(key, category_key)
+                for name, expected in self.sum_by_category(key, category_key).items():
+                    actual = running.get(name, 0.0)
+                    if not math.isclose(actual, expected, rel_tol=rel_tol, abs_tol=abs_tol):
+                        problems.append(f"{category_key}={name} {key}: {actual} != {expected}")
+        return problems
+
+    # --- Access ---
+
+    def value(self, index, key):
+        kind = self.kinds[key]
+        raw = self._columns[key][index]
+        if kind == "object":
+            return raw
+        if kind == "float":
+            return float(raw)
+        if kind == "month":
+            return MONTHS[raw - 1] if raw else None
+        if kind == "category":
+            return self.categories[raw]
+        if kind == "inputs":
+            return None if np.isnan(raw[0]) else [float(x) for x in raw]
+        return int(raw) if raw else None
+
+    def column(self, key):
+        # Zero-copy view of the live rows; do not hold on to it across mutations
+        return self._columns[key][:self._size]
+
+    def labels(self, key):
+        kind = self.kinds[key]
+        column = self.column(key)
+        if kind == "month":
+            return [MONTHS[m - 1] if m else "" for m in column]
+        if kind == "category":
+            return [self.categories[c] for c in column]
+        return list(column)
+
+    def sum(self, key):
+        # Full recompute; prefer total() for the running value
+        return float(self.column(key).sum())
+
+    def cumsum(self, key):
+        return np.cumsum(self.column(key))
+
+    def sum_by_category(self, key, category_key=None):
+        category_key = self._category_key(category_key)
+        counts = np.bincount(
+            self.column(category_key), weights=self.column(key), minlength=len(self.categories)
+        )
+        return {name: float(total) for name, total in zip(self.categories, counts) if name is not None}
+
+    def log_record(self, index):
+        inputs = self.value(index, "Inputs")
+        if inputs is None:
+            return None
+        return LogRecord(
+            self.value(index, "Month"), self.value(index, "Salary"), inputs,
+            self.value(index, "Debt Type"), self.value(index, "Expenses"),
+            self.value(index, "Savings"), self.value(index, "Invested")
+        )
+
+    def log_text(self, index):
+        record = self.log_record(index)
+        if record is not None:
+            return record.render()
+        row = self[index]
+        return "".join(f"{key}: {row[key]:.2f}\n" if isinstance(row[key], float) else f"{key}: {row[key]}\n" for key in row)
+
+    def to_entries(self):
+        return [dict(row) for row in self]
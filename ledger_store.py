@@ -0,0 +1,488 @@
+# ledger_store.py
+# Contains storage backends for the finance ledger
+
+import json
+import os
+import threading
+
+COMPACT_THRESHOLD = 1000
+LOAD_CHUNK = 1000
+READ_BLOCK = 1 << 16
+
+
+def iter_json_entries(path, block_size=READ_BLOCK):
+    # Yield the objects of a top-level JSON array one at a time, reading the
+    # file in fixed-size blocks so memory tracks the block, not the file.
+    decoder = json.JSONDecoder()
+    with open(path, "r") as f:
+        buf = ""
+        pos = 0
+        started = False
+        eof = False
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                if eof:
+                    raise ValueError(f"{path}: unexpected end of file")
+                block = f.read(block_size)
+                eof = not block
+                buf = buf[pos:] + block
+                pos = 0
+                continue
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError(f"{path}: expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if eof:
+                    raise
+                block = f.read(block_size)
+                eof = not block
+                buf = buf[pos:] + block
+                pos = 0
+                continue
+            yield obj
+            pos = end
+
+
+def replay(data, record):
+    # Apply one journal record to a list or Ledger
+    op = record.get("op")
+    if op == "add":
+        data.append(record["entry"])
+    elif op == "delete":
+        index = record["index"]
+        if 0 <= index < len(data):
+            del data[index]
+    elif op == "clear":
+        data.clear()
+
+
+def iter_chunks(items, chunk_size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class JournalStore:
+    # The ledger lives in a base snapshot (the classic finance_data.json list)
+    # plus an append-only journal of add/delete records next to it. Every
+    # mutation appends one line, so a write costs the same for 10 or 100k
+    # entries. Once the journal grows past the threshold it is folded back
+    # into the snapshot on a background thread.
+    #
+    # A compaction or full save commits by writing the new snapshot and the
+    # remaining journal tail to .next files and then a .commit marker. Only
+    # after that are the two files swapped in, and a crash part-way is rolled
+    # forward on the next start. Without the marker, the .next files are
+    # discarded. So the folded records are never replayed twice or lost.
+
+    def __init__(self, path, compact_threshold=COMPACT_THRESHOLD):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        self._journal = None
+        self._records = 0
+        self._compacting = False
+        # Bumped by save() and clear(); a compaction started before either
+        # is dropped instead of bringing back the old contents
+        self._generation = 0
+        # Finished (or abandoned) compactions
+        self.compactions = 0
+        with self._lock:
+            self._recover()
+
+    def _recover(self):
+        marker = self.path + ".commit"
+        if os.path.exists(marker):
+            for target in (self.path, self.journal_path):
+                if os.path.exists(target + ".next"):
+                    os.replace(target + ".next", target)
+            os.remove(marker)
+        else:
+            for leftover in (self.path + ".next", self.journal_path + ".next", self.path + ".compacting"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+    def load(self):
+        data = []
+        for records in self.iter_load():
+            for record in records:
+                replay(data, record)
+        return data
+
+    def iter_load(self, chunk_size=LOAD_CHUNK):
+        # Stream the ledger as chunks of journal-style records: the snapshot
+        # as "add" records, then the journal itself. Only the journal that
+        # existed when loading began is replayed.
+        self._records = 0
+        if os.path.exists(self.path):
+            adds = ({"op": "add", "entry": e} for e in iter_json_entries(self.path))
+            yield from iter_chunks(adds, chunk_size)
+        if os.path.exists(self.journal_path):
+            with self._lock:
+                if self._journal is not None:
+                    self._journal.flush()
+                end = os.path.getsize(self.journal_path)
+            yield from iter_chunks(self._iter_journal(end), chunk_size)
+
+    def _iter_journal(self, end):
+        with open(self.journal_path, "rb") as f:
+            while f.tell() < end:
+                line = f.readline()
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-append
+                    return
+                self._records += 1
+                yield record
+
+    def append(self, entry):
+        self._write({"op": "add", "entry": entry})
+
+    def delete(self, index):
+        self._write({"op": "delete", "index": index})
+
+    def _write(self, record):
+        self.write_batch([record])
+
+    def write_batch(self, records):
+        # One write and one fsync for a whole burst of records
+        lines = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+        with self._lock:
+            if self._journal is None:
+                self._journal = open(self.journal_path, "a")
+            self._journal.write(lines)
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._records += len(records)
+
+    def save(self, data):
+        # Full rewrite: used for imports and explicit compaction
+        with self._lock:
+            self._generation += 1
+            self._write_snapshot(data, self.path + ".next")
+            self._commit(b"")
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._close_journal()
+            # Journal first: on its own it would replay as a partial ledger
+            for path in (self.journal_path, self.path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._records = 0
+
+    def needs_compaction(self):
+        return self._records >= self.compact_threshold and not self._compacting
+
+    def maybe_compact(self, data):
+        # Called after each mutation; only copies the list once the journal is long
+        if not self.needs_compaction():
+            return None
+        return self.compact(data.copy())
+
+    def compact(self, snapshot, on_error=None):
+        # The snapshot must reflect exactly the records written so far.
+        # on_error(exception) is called from the compaction thread if it fails.
+        if self._compacting:
+            return None
+        with self._lock:
+            if self._journal is not None:
+                self._journal.flush()
+            offset = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+            self._compacting = True
+            generation = self._generation
+        thread = threading.Thread(target=self._compact, args=(snapshot, offset, generation, on_error), daemon=True)
+        thread.start()
+        return thread
+
+    def _compact(self, snapshot, offset, generation, on_error):
+        # Written outside the lock under its own name, so a save() meanwhile
+        # can't collide with it
+        work_path = self.path + ".compacting"
+        try:
+            self._write_snapshot(snapshot, work_path)
+            with self._lock:
+                if generation != self._generation:
+                    # Saved or cleared meanwhile: the snapshot is stale and
+                    # offset points into a journal that no longer exists
+                    os.remove(work_path)
+                    return
+                os.replace(work_path, self.path + ".next")
+                # Keep whatever was appended while the snapshot was written
+                tail = b""
+                if self._journal is not None:
+                    self._journal.flush()
+                if os.path.exists(self.journal_path):
+                    with open(self.journal_path, "rb") as f:
+                        f.seek(offset)
+                        tail = f.read()
+                self._commit(tail)
+        except Exception as e:
+            with self._lock:
+                if not os.path.exists(self.path + ".commit"):
+                    for leftover in (work_path, self.path + ".next", self.journal_path + ".next"):
+                        if os.path.exists(leftover):
+                            os.remove(leftover)
+            if on_error is not None:
+                on_error(e)
+        finally:
+            self._compacting = False
+            self.compactions += 1
+
+    def _commit(self, tail):
+        # Swap in <path>.next with `tail` as the new journal; lock held
+        self._close_journal()
+        # Written even when empty, so the roll-forward always replaces the
+        # journal whose records are now in the snapshot
+        with open(self.journal_path + ".next", "wb") as f:
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+        self._write_marker()
+        self._recover()
+        if not tail:
+            os.remove(self.journal_path)
+        self._records = tail.count(b"\n")
+
+    def _write_marker(self):
+        marker = self.path + ".commit"
+        with open(marker + ".tmp", "w") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(marker + ".tmp", marker)
+
+    def _write_snapshot(self, data, path):
+        with open(path, "w") as f:
+            json.dump([dict(e) for e in data], f)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def close(self):
+        with self._lock:
+            self._close_journal()
+
+
+# Column layouts for the SQLite backend: (entry key, column, type, indexed)
+LEDGER_SCHEMA = {
+    "table": "ledger",
+    "columns": [
+        ("Month", "month", "TEXT", True),
+        ("Year", "year", "INTEGER", True),
+        ("Salary", "salary", "REAL", True),
+        ("Expenses", "expenses", "REAL", True),
+        ("Savings", "savings", "REAL", True),
+        ("Invested", "invested", "REAL", True),
+        ("Debt Type", "debt_type", "TEXT", False),
+        # Legacy rendered text; new rows keep packed "Inputs" in extra
+        ("Log", "log", "TEXT", False),
+    ],
+}
+
+TRANSACTION_SCHEMA = {
+    "table": "transactions",
+    "columns": [
+        ("date", "date", "TEXT", True),
+        ("description", "description", "TEXT", False),
+        ("amount", "amount", "REAL", True),
+        ("category", "category", "TEXT", True),
+    ],
+}
+
+
+class SqliteStore:
+    # Same interface as JournalStore, backed by an indexed SQLite table so
+    # totals and range filters run in SQL rather than over the Python list.
+    # Keys outside the schema are kept in a JSON "extra" column.
+
+    def __init__(self, path, schema=LEDGER_SCHEMA):
+        import sqlite3
+        self.path = path
+        self.schema = schema
+        self.table = schema["table"]
+        self.keys = [c[0] for c in schema["columns"]]
+        self.names = [c[1] for c in schema["columns"]]
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._ids = []
+        self._create()
+
+    def _create(self):
+        cols = ", ".join(f"{name} {kind}" for _, name, kind, _ in self.schema["columns"])
+        with self.conn:
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} (id INTEGER PRIMARY KEY, {cols}, extra TEXT)"
+            )
+            for _, name, _, indexed in self.schema["columns"]:
+                if indexed:
+                    self.conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{self.table}_{name} ON {self.table} ({name})"
+                    )
+
+    def _row(self, entry):
+        extra = {k: v for k, v in entry.items() if k not in self.keys}
+        return [entry.get(k) for k in self.keys] + [json.dumps(extra) if extra else None]
+
+    def _entry(self, row):
+        entry = {k: v for k, v in zip(self.keys, row[1:]) if v is not None}
+        if row[-1]:
+            entry.update(json.loads(row[-1]))
+        return entry
+
+    def load(self):
+        data = []
+        for records in self.iter_load():
+            data.extend(record["entry"] for record in records)
+        return data
+
+    def iter_load(self, chunk_size=LOAD_CHUNK):
+        cur = self.conn.execute(f"SELECT id, {', '.join(self.names)}, extra FROM {self.table} ORDER BY id")
+        self._ids = []
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                return
+            self._ids.extend(row[0] for row in rows)
+            yield [{"op": "add", "entry": self._entry(row)} for row in rows]
+
+    def append(self, entry):
+        placeholders = ", ".join("?" * (len(self.names) + 1))
+        with self._lock, self.conn:
+            cur = self.conn.execute(
+                f"INSERT INTO {self.table} ({', '.join(self.names)}, extra) VALUES ({placeholders})",
+                self._row(entry),
+            )
+            self._ids.append(cur.lastrowid)
+
+    def delete(self, index):
+        with self._lock, self.conn:
+            row_id = self._ids.pop(index)
+            self.conn.execute(f"DELETE FROM {self.table} WHERE id = ?", (row_id,))
+
+    def write_batch(self, records):
+        # Apply a burst of journal-style records in a single transaction
+        placeholders = ", ".join("?" * (len(self.names) + 1))
+        with self._lock, self.conn:
+            for record in records:
+                if record["op"] == "add":
+                    cur = self.conn.execute(
+                        f"INSERT INTO {self.table} ({', '.join(self.names)}, extra) VALUES ({placeholders})",
+                        self._row(record["entry"]),
+                    )
+                    self._ids.append(cur.lastrowid)
+                elif record["op"] == "delete":
+                    row_id = self._ids.pop(record["index"])
+                    self.conn.execute(f"DELETE FROM {self.table} WHERE id = ?", (row_id,))
+
+    def save(self, data):
+        placeholders = ", ".join("?" * (len(self.names) + 1))
+        with self._lock, self.conn:
+            self.conn.execute(f"DELETE FROM {self.table}")
+            self.conn.executemany(
+                f"INSERT INTO {self.table} ({', '.join(self.names)}, extra) VALUES ({placeholders})",
+                (self._row(e) for e in data),
+            )
+        self.load()
+
+    def clear(self):
+        with self._lock, self.conn:
+            self.conn.execute(f"DELETE FROM {self.table}")
+            self._ids = []
+
+    def needs_compaction(self):
+        return False
+
+    def maybe_compact(self, data):
+        return None
+
+    def compact(self, snapshot, on_error=None):
+        return None
+
+    @property
+    def compactions(self):
+        return 0
+
+    def close(self):
+        self.conn.close()
+
+    # --- Queries ---
+
+    def totals(self, where="", params=()):
+        numeric = [name for _, name, kind, _ in self.schema["columns"] if kind == "REAL"]
+        sums = ", ".join(f"COALESCE(SUM({name}), 0)" for name in numeric)
+        sql = f"SELECT COUNT(*), {sums} FROM {self.table}"
+        if where:
+            sql += f" WHERE {where}"
+        row = self.conn.execute(sql, params).fetchone()
+        result = {"count": row[0]}
+        keys = [key for key, _, kind, _ in self.schema["columns"] if kind == "REAL"]
+        result.update(zip(keys, row[1:]))
+        return result
+
+    def query_range(self, key, low=None, high=None):
+        name = self.names[self.keys.index(key)]
+        clauses, params = [], []
+        if low is not None:
+            clauses.append(f"{name} >= ?")
+            params.append(low)
+        if high is not None:
+            clauses.append(f"{name} <= ?")
+            params.append(high)
+        sql = f"SELECT id, {', '.join(self.names)}, extra FROM {self.table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id"
+        return [self._entry(row) for row in self.conn.execute(sql, params)]
+
+    def category_totals(self):
+        rows = self.conn.execute(
+            f"SELECT category, COALESCE(SUM(amount), 0) FROM {self.table} GROUP BY category"
+        )
+        return dict(rows.fetchall())
+
+    # --- JSON import/export ---
+
+    def import_json(self, json_path):
+        with open(json_path, "r") as f:
+            self.save(json.load(f))
+
+    def export_json(self, json_path):
+        tmp_path = json_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.load(), f)
+        os.replace(tmp_path, json_path)
+
+
+def open_store(json_path, backend=None, schema=LEDGER_SCHEMA):
+    # Pick the ledger backend; FINANCE_STORE=sqlite switches to SQLite and
+    # imports an existing JSON ledger the first time the database is created.
+    backend = backend or os.environ.get("FINANCE_STORE", "journal")
+    if backend == "sqlite":
+        db_path = os.path.splitext(json_path)[0] + ".db"
+        fresh = not os.path.exists(db_path)
+        store = SqliteStore(db_path, schema)
+        if fresh and os.path.exists(json_path):
+            store.import_json(json_path)
+        return store
+    return JournalStore(json_path)
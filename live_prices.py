@@ -0,0 +1,104 @@
+# live_prices.py
+# Contains the Binance websocket price stream used by the dashboard's live mode (no Qt)
+
+import json
+import os
+import threading
+import time
+
+import websocket
+
+# Can point at the local replay server (see mock_binance.py --stream-port)
+BINANCE_WS_URL = os.environ.get("BINANCE_WS_URL", "wss://stream.binance.com:9443")
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
+
+def stream_url(base_url, symbols):
+    # Combined stream of 24h ticker updates for the given symbols
+    streams = "/".join(f"{symbol.lower()}@ticker" for symbol in sorted(symbols))
+    return f"{base_url.rstrip('/')}/stream?streams={streams}"
+
+
+def parse_tick(message):
+    # (symbol, last price, 24h change %) from a combined-stream or raw
+    # ticker message; None for anything else
+    try:
+        data = json.loads(message)
+    except ValueError:
+        return None
+    data = data.get("data", data) if isinstance(data, dict) else None
+    if not data or "s" not in data or "c" not in data:
+        return None
+    return data["s"], float(data["c"]), float(data.get("P", 0))
+
+
+class PriceStream:
+    # Receives ticks on a background thread and keeps only the latest one
+    # per symbol. The GUI calls drain() once per frame, so however many ticks
+    # arrive in between, each symbol is applied at most once. Reconnects with
+    # backoff until stopped.
+
+    def __init__(self, symbols, base_url=None):
+        self.symbols = set(symbols)
+        self.url = stream_url(base_url or BINANCE_WS_URL, self.symbols)
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._app = None
+        self.connected = False
+        self.last_error = None
+        self.ticks = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name="price-stream", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2):
+        self._stop.set()
+        if self._app is not None:
+            self._app.close()
+        self._thread.join(timeout)
+
+    def drain(self):
+        # {symbol: (price, change %)} received since the last call
+        with self._lock:
+            latest, self._latest = self._latest, {}
+        if latest:
+            self.batches += 1
+        return latest
+
+    def stats(self):
+        return {"connected": self.connected, "ticks": self.ticks, "batches": self.batches, "last_error": self.last_error}
+
+    def _on_message(self, _app, message):
+        tick = parse_tick(message)
+        if tick is None or tick[0] not in self.symbols:
+            return
+        with self._lock:
+            self._latest[tick[0]] = tick[1:]
+            self.ticks += 1
+
+    def _on_open(self, _app):
+        self.connected = True
+        self.last_error = None
+
+    def _on_error(self, _app, error):
+        self.last_error = str(error)
+
+    def _run(self):
+        delay = RECONNECT_DELAY
+        while not self._stop.is_set():
+            self._app = websocket.WebSocketApp(
+                self.url, on_open=self._on_open, on_message=self._on_message, on_error=self._on_error
+            )
+            opened = time.monotonic()
+            self._app.run_forever(ping_interval=60, ping_timeout=10)
+            self.connected = False
+            if self._stop.is_set():
+                return
+            # Back off only while connections keep failing quickly
+            delay = RECONNECT_DELAY if time.monotonic() - opened > MAX_RECONNECT_DELAY else min(delay * 2, MAX_RECONNECT_DELAY)
+            self._stop.wait(delay)
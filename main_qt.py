@@ -1,23 +1,47 @@
 import sys
 import os
-import json
+from datetime import datetime
+import numpy as np
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QTabWidget, QVBoxLayout, QHBoxLayout,
     QFormLayout, QLineEdit, QRadioButton, QButtonGroup, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QMessageBox, QScrollArea, QTextEdit, QComboBox
+    QTableView, QMessageBox, QScrollArea, QTextEdit, QComboBox, QFileDialog, QProgressDialog, QCheckBox
 )
-from PySide6.QtCore import Qt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
-from fpdf import FPDF
+from PySide6.QtCore import Qt, QTimer
+from ledger_store import open_store, replay
+from ledger import Ledger
+from models import LedgerTableModel, SpanTableModel, WalletTableModel
+from persistence import PersistenceWorker
+from snapshots import SnapshotStore
+from wallet_registry import get_registry
+from price_cache import PRICE_CACHE, CACHE_FILE as PRICE_CACHE_FILE
+from engine import INPUT_KEYS
+from calc_graph import MonthCalc
+from growth import POOL_MIN_MONTHS, SeriesCache, SimulationJob, contribution_schedule, growth_series, sweep
+from tracing import TRACER, traced
+
+# Snapshot history name for the merged all-wallets view
+ALL_WALLETS = "All Wallets"
+# Live ticks are applied at most this often (about 30 frames a second)
+LIVE_FRAME_MS = 33
+# The savings preview is recomputed at most once per frame while typing
+PREVIEW_FRAME_MS = 16
+# Spans listed in the diagnostics panel
+DIAGNOSTIC_ROWS = 100
+# Most values a start:stop:step sweep range may expand to
+MAX_SWEEP_VALUES = 1000
 
 class FinanceApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Personal Finance Tracker (Qt)")
-        self.data = []
+        self.data = Ledger()
         self.json_file = "finance_data.json"
+        self.store = open_store(self.json_file)
+        self.persistence = PersistenceWorker(self.store)
+        # Store and worker counters when the last compaction was queued
+        self.compaction_request = None
+        self.growth_cache = SeriesCache()
         self.init_ui()
         self.load_data()
 
@@ -68,7 +92,7 @@ class FinanceApp(QMainWindow):
                 padding: 6px;
                 font-size: 14px;
             }
-            QTableWidget {
+            QTableView {
                 background: #232629;
                 color: #fff;
                 gridline-color: #444;
@@ -82,7 +106,7 @@ class FinanceApp(QMainWindow):
                 border: none;
                 padding: 8px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background: #00c3ff;
                 color: #232629;
             }
@@ -140,28 +164,97 @@ class FinanceApp(QMainWindow):
         data_layout.addWidget(form_widget)
 
         # Table
-        self.table = QTableWidget(0, 5)
-        self.table.setHorizontalHeaderLabels(["Month", "Salary", "Expenses", "Savings", "Invested"])
+        self.table_model = LedgerTableModel(self.data)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
         self.table.horizontalHeader().setStretchLastSection(True)
         data_layout.addWidget(self.table)
 
+        # Running totals, read from the ledger's aggregates
+        self.summary_label = QLabel("")
+        data_layout.addWidget(self.summary_label)
+        self.table_model.modelReset.connect(self.update_summary)
+        self.table_model.rowsInserted.connect(self.update_summary)
+        self.table_model.rowsRemoved.connect(self.update_summary)
+
         # Buttons
         btn_layout = QHBoxLayout()
         self.btn_chart = QPushButton("Show Chart")
         self.btn_pdf = QPushButton("Export PDF")
         self.btn_logs = QPushButton("Show Logs")
+        self.btn_diagnostics = QPushButton("Diagnostics")
         self.btn_delete = QPushButton("Delete Entry")
         self.btn_clear = QPushButton("Clear Database")
         btn_layout.addWidget(self.btn_chart)
         btn_layout.addWidget(self.btn_pdf)
         btn_layout.addWidget(self.btn_logs)
+        btn_layout.addWidget(self.btn_diagnostics)
         btn_layout.addWidget(self.btn_delete)
         data_layout.addLayout(btn_layout)
         data_layout.addWidget(self.btn_clear)
 
-        # --- Investment Growth Tab ---
+        # Storage status, polled from the persistence worker
+        self.storage_status_label = QLabel("")
+        self.storage_status_label.setStyleSheet("font-size: 12px; color: #888;")
+        data_layout.addWidget(self.storage_status_label)
+        self.storage_timer = QTimer(self)
+        self.storage_timer.timeout.connect(self.update_storage_status)
+        self.storage_timer.start(1000)
+        self.report_job = None
+        self.report_timer = QTimer(self)
+        self.report_timer.timeout.connect(self.update_report_progress)
+        self.simulation_job = None
+        self.simulation_timer = QTimer(self)
+        self.simulation_timer.timeout.connect(self.update_simulation)
+        self.diagnostics_win = None
+        # Created by show_chart on first use
+        self.chart_win = None
+        self.chart_view = None
+
+        # --- Investment Growth and Binance Dashboard Tabs ---
+        # Built the first time they are selected, so the window paints after
+        # laying out just this tab; matplotlib and the network stack are
+        # imported when a feature first needs them
         self.tab_growth = QWidget()
         self.tabs.addTab(self.tab_growth, "Investment Growth")
+        self.tab_binance = QWidget()
+        self.tabs.addTab(self.tab_binance, "Binance Dashboard")
+        self.growth_tab_built = False
+        self.binance_tab_built = False
+        self.tabs.currentChanged.connect(self.build_tab)
+
+        # Live savings preview: each edit updates one input of the
+        # calculation graph, and the label is refreshed on the next frame
+        self.month_calc = MonthCalc()
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_FRAME_MS)
+        self.preview_timer.timeout.connect(self.update_savings_pct)
+
+        # --- Signals ---
+        for entry in ["Salary", "Phone Bill", "Petrol Money", "Annual Rent", "Living Expenses", "Debt Amount"]:
+            self.entries[entry].textChanged.connect(lambda text, key=entry: self.preview_input_changed(key, text))
+        self.rb_personal.toggled.connect(lambda _checked: self.preview_input_changed("Debt Type", self.current_debt_type()))
+        self.btn_add.clicked.connect(self.add_data)
+        self.btn_chart.clicked.connect(self.show_chart)
+        self.btn_pdf.clicked.connect(self.export_pdf)
+        self.btn_logs.clicked.connect(self.show_logs)
+        self.btn_diagnostics.clicked.connect(self.show_diagnostics)
+        self.btn_delete.clicked.connect(self.delete_entry)
+        self.btn_clear.clicked.connect(self.clear_database)
+
+    def build_tab(self, index):
+        widget = self.tabs.widget(index)
+        if widget is self.tab_growth:
+            self.build_growth_tab()
+        elif widget is self.tab_binance:
+            self.build_binance_tab()
+
+    @traced()
+    def build_growth_tab(self):
+        if self.growth_tab_built:
+            return
+        self.growth_tab_built = True
         growth_layout = QVBoxLayout(self.tab_growth)
 
         growth_form = QFormLayout()
@@ -175,17 +268,44 @@ class FinanceApp(QMainWindow):
         growth_form.addRow(self.btn_growth)
         growth_form.addRow("Final Value", self.final_value_label)
         growth_form.addRow("Total Invested", self.total_invested_label)
+
+        # Monte Carlo simulation around the same CAGR
+        self.volatility_entry = QLineEdit("15")
+        self.paths_entry = QLineEdit("10000")
+        self.seed_entry = QLineEdit()
+        self.seed_entry.setPlaceholderText("random")
+        self.btn_simulate = QPushButton("Run Simulation")
+        self.simulated_value_label = QLabel("-")
+        growth_form.addRow("Volatility (%)", self.volatility_entry)
+        growth_form.addRow("Paths", self.paths_entry)
+        growth_form.addRow("Seed", self.seed_entry)
+        growth_form.addRow(self.btn_simulate)
+        growth_form.addRow("Final Value p5 / p50 / p95", self.simulated_value_label)
+
+        # CAGR x period sweep
+        self.sweep_cagr_entry = QLineEdit("4, 6, 8, 10, 12")
+        self.sweep_period_entry = QLineEdit("12, 60, 120, 240, 360")
+        self.btn_sweep = QPushButton("Show Sweep Heatmap")
+        growth_form.addRow("Sweep CAGRs (%)", self.sweep_cagr_entry)
+        growth_form.addRow("Sweep Periods (months)", self.sweep_period_entry)
+        growth_form.addRow(self.btn_sweep)
         growth_form_widget = QWidget()
         growth_form_widget.setLayout(growth_form)
         growth_layout.addWidget(growth_form_widget)
 
-        self.growth_canvas = None
+        self.growth_chart = None
 
-        # --- Binance Wallet Dashboard Tab ---
-        self.tab_binance = QWidget()
-        self.tabs.addTab(self.tab_binance, "Binance Dashboard")
-        binance_layout = QVBoxLayout(self.tab_binance)
+        self.btn_growth.clicked.connect(self.show_growth_graph)
+        self.btn_simulate.clicked.connect(self.show_growth_simulation)
+        self.btn_sweep.clicked.connect(self.show_growth_sweep)
 
+    @traced()
+    def build_binance_tab(self):
+        if self.binance_tab_built:
+            return
+        self.binance_tab_built = True
+        from binance_client import USD_TO_AED, BinanceClient
+        binance_layout = QVBoxLayout(self.tab_binance)
 
         # Multiple wallet support
         self.wallet_name_entry = QLineEdit()
@@ -214,14 +334,16 @@ class FinanceApp(QMainWindow):
         self.wallet_summary_label = QLabel("Total Holdings: AED 0.00 | Wallet PnL: 0.00%")
         self.wallet_summary_label.setStyleSheet("font-weight: bold; font-size: 18px; margin-bottom: 16px; color: #00c3ff;")
         binance_layout.addWidget(self.wallet_summary_label)
+        # Per-wallet values when all wallets are shown together
+        self.wallet_breakdown_label = QLabel("")
+        self.wallet_breakdown_label.setWordWrap(True)
+        binance_layout.addWidget(self.wallet_breakdown_label)
 
-        self.wallet_table = QTableWidget()
-        self.wallet_table.setColumnCount(6)
-        self.wallet_table.setHorizontalHeaderLabels([
-            "Asset", "Total", "Price (USD)", "Price (AED)", "Daily PnL (%)", "Holding Value (AED)"
-        ])
+        self.wallet_model = WalletTableModel()
+        self.wallet_table = QTableView()
+        self.wallet_table.setModel(self.wallet_model)
         self.wallet_table.horizontalHeader().setStretchLastSection(True)
-        self.wallet_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.wallet_table.setEditTriggers(QTableView.NoEditTriggers)
         self.wallet_table.setAlternatingRowColors(True)
         self.wallet_table.setStyleSheet("alternate-background-color: #2d3136; background-color: #232629;")
         binance_layout.addWidget(self.wallet_table)
@@ -234,34 +356,60 @@ class FinanceApp(QMainWindow):
 
         # Refresh button
         self.btn_refresh_wallet = QPushButton("Refresh Wallet")
-        binance_layout.addWidget(self.btn_refresh_wallet)
+        self.btn_refresh_all = QPushButton("Refresh All Wallets")
+        self.btn_cancel_refresh = QPushButton("Cancel Refresh")
+        self.btn_cancel_refresh.setEnabled(False)
+        self.btn_live = QPushButton("Start Live Prices")
+        refresh_layout = QHBoxLayout()
+        refresh_layout.addWidget(self.btn_refresh_wallet)
+        refresh_layout.addWidget(self.btn_refresh_all)
+        refresh_layout.addWidget(self.btn_live)
+        # Value history of the last refreshed wallet, from recorded snapshots
+        self.history_interval_combo = QComboBox()
+        self.history_interval_combo.addItems(["hour", "day", "week"])
+        self.history_interval_combo.setCurrentText("day")
+        self.btn_history = QPushButton("Show History")
+        refresh_layout.addWidget(self.history_interval_combo)
+        refresh_layout.addWidget(self.btn_history)
+        self.snapshots = SnapshotStore()
+        self.wallet_job_name = None
+        self.wallet_job_failed = {}
+        self.history_win = None
+        self.history_chart = None
+        refresh_layout.addWidget(self.btn_cancel_refresh)
+        binance_layout.addLayout(refresh_layout)
+        self.wallet_job = None
+        self.wallet_timer = QTimer(self)
+        self.wallet_timer.timeout.connect(self.update_wallet_refresh)
+        self.wallet_usd_to_aed = USD_TO_AED
+        # Live mode: ticks are coalesced by the stream and applied once per frame
+        self.price_stream = None
+        self.live_rows = {}
+        self.live_timer = QTimer(self)
+        self.live_timer.timeout.connect(self.apply_live_prices)
 
         # Signals for API key save and wallet refresh
 
         self.btn_save_api.clicked.connect(self.save_binance_wallet)
         self.btn_load_wallet.clicked.connect(self.load_selected_wallet)
         self.btn_refresh_wallet.clicked.connect(self.refresh_wallet)
+        self.btn_refresh_all.clicked.connect(self.refresh_all_wallets)
+        self.btn_cancel_refresh.clicked.connect(self.cancel_wallet_refresh)
+        self.btn_live.clicked.connect(self.toggle_live_prices)
+        self.btn_history.clicked.connect(self.show_wallet_history)
 
-        self.wallets = self.load_all_wallets()
+        # Saved wallets are read once and kept in memory; the file is only
+        # re-read when it changes on disk
+        self.wallet_registry = get_registry()
+        self.wallet_registry.watch(self.on_wallets_changed)
         self.update_wallet_combo()
         self.current_wallet = None
+        self.current_wallet_name = None
+        self.binance_client = BinanceClient()
+        # Prices from the last session, so the first refresh can answer from cache
+        PRICE_CACHE.load(PRICE_CACHE_FILE)
 
-
-        # --- Signals ---
-        for entry in ["Salary", "Phone Bill", "Petrol Money", "Annual Rent", "Living Expenses", "Debt Amount"]:
-            self.entries[entry].textChanged.connect(self.update_savings_pct)
-        self.rb_personal.toggled.connect(self.update_savings_pct)
-        self.rb_housing.toggled.connect(self.update_savings_pct)
-        self.btn_add.clicked.connect(self.add_data)
-        self.btn_chart.clicked.connect(self.show_chart)
-        self.btn_pdf.clicked.connect(self.export_pdf)
-        self.btn_logs.clicked.connect(self.show_logs)
-        self.btn_delete.clicked.connect(self.delete_entry)
-        self.btn_clear.clicked.connect(self.clear_database)
-        self.btn_growth.clicked.connect(self.show_growth_graph)
-
-
-
+    @traced()
     def save_binance_wallet(self):
         # Save wallet credentials with a name
         name = self.wallet_name_entry.text().strip()
@@ -270,248 +418,401 @@ class FinanceApp(QMainWindow):
         if not name or not api_key or not api_secret:
             QMessageBox.warning(self, "Warning", "Please enter wallet name, API key, and secret.")
             return
-        self.wallets[name] = {"api_key": api_key, "api_secret": api_secret}
+        if name == ALL_WALLETS:
+            # Reserved for the combined history of Refresh All
+            QMessageBox.warning(self, "Warning", f"'{ALL_WALLETS}' is reserved. Please choose another name.")
+            return
         try:
-            with open("binance_wallets.json", "w") as f:
-                json.dump(self.wallets, f)
+            self.wallet_registry.save(name, api_key, api_secret)
             QMessageBox.information(self, "Success", f"Wallet '{name}' saved.")
             self.update_wallet_combo()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to save wallet: {e}")
 
-    def load_all_wallets(self):
-        # Load all wallets from file
-        try:
-            with open("binance_wallets.json", "r") as f:
-                return json.load(f)
-        except Exception:
-            return {}
+    def on_wallets_changed(self):
+        # binance_wallets.json was edited outside this window
+        self.update_wallet_combo()
+        if self.current_wallet_name is not None:
+            self.current_wallet = self.wallet_registry.get(self.current_wallet_name)
+            if self.current_wallet is None:
+                self.current_wallet_name = None
 
     def update_wallet_combo(self):
+        names = self.wallet_registry.names()
+        selected = self.wallet_select_combo.currentText()
         self.wallet_select_combo.clear()
-        for name in self.wallets.keys():
-            self.wallet_select_combo.addItem(name)
+        self.wallet_select_combo.addItems(names)
+        if selected in names:
+            self.wallet_select_combo.setCurrentText(selected)
 
+    @traced()
     def load_selected_wallet(self):
         name = self.wallet_select_combo.currentText()
-        if name in self.wallets:
-            self.current_wallet = self.wallets[name]
+        wallet = self.wallet_registry.get(name)
+        if wallet is not None:
+            self.current_wallet = wallet
+            self.current_wallet_name = name
             QMessageBox.information(self, "Loaded", f"Loaded wallet: {name}")
         else:
             QMessageBox.warning(self, "Warning", "Selected wallet not found.")
 
+    @traced()
     def refresh_wallet(self):
-        self.loading_label.setText("Fetching wallet data... Please wait.")
-        QApplication.processEvents()
         # Use selected wallet
         if not self.current_wallet:
             self.loading_label.setText("")
             self.wallet_summary_label.setText("No wallet selected. Please select a wallet above.")
-            self.wallet_table.setRowCount(0)
+            self.wallet_model.clear()
             return
-        api_key = self.current_wallet.get("api_key")
-        api_secret = self.current_wallet.get("api_secret")
-        try:
-            import requests
-            from urllib.parse import urlencode
-            import hmac, hashlib, time
-            base_url = "https://api.binance.com"
-            endpoint = "/api/v3/account"
-            timestamp = int(time.time() * 1000)
-            query = urlencode({"timestamp": timestamp})
-            signature = hmac.new(api_secret.encode(), query.encode(), hashlib.sha256).hexdigest()
-            headers = {"X-MBX-APIKEY": api_key}
-            url = f"{base_url}{endpoint}?{query}&signature={signature}"
-            resp = requests.get(url, headers=headers)
-            if resp.status_code != 200:
-                self.loading_label.setText("")
-                self.wallet_summary_label.setText(f"Failed to fetch wallet: {resp.text}")
-                self.wallet_table.setRowCount(0)
-                return
-            data = resp.json()
-            balances = [b for b in data["balances"] if float(b["free"]) > 0 or float(b["locked"]) > 0]
-            if not balances:
+        # A newer refresh supersedes the running one; its results are dropped
+        self.cancel_wallet_refresh(quiet=True)
+        from binance_client import WalletRefresh
+        # One pooled client for the app; each refresh carries its own keys
+        job = WalletRefresh(self.binance_client, api_key=self.current_wallet.get("api_key"),
+                            api_secret=self.current_wallet.get("api_secret"))
+        name = self.current_wallet_name or "wallet"
+        # A wallet saved as ALL_WALLETS outside the app doesn't get to write
+        # into the combined history
+        self.start_wallet_refresh(job, name if name != ALL_WALLETS else None)
+
+    @traced()
+    def refresh_all_wallets(self):
+        # Every saved wallet at once, merged into one holdings table
+        wallets = self.wallet_registry.all()
+        if not wallets:
+            self.wallet_summary_label.setText("No saved wallets. Save a wallet above first.")
+            self.wallet_model.clear()
+            return
+        from binance_client import WalletRefresh
+        self.cancel_wallet_refresh(quiet=True)
+        self.start_wallet_refresh(WalletRefresh(self.binance_client, wallets=wallets), ALL_WALLETS)
+
+    def start_wallet_refresh(self, job, history_name):
+        # history_name is where the finished refresh is recorded as a snapshot
+        # (None: not recorded)
+        self.wallet_job_name = history_name
+        self.wallet_job_failed = {}
+        self.loading_label.setText("Fetching wallet data...")
+        self.wallet_breakdown_label.setText("")
+        self.wallet_job = job.start()
+        self.btn_cancel_refresh.setEnabled(True)
+        self.wallet_timer.start(50)
+
+    @traced()
+    def cancel_wallet_refresh(self, quiet=False):
+        if self.wallet_job is None:
+            return
+        self.wallet_job.cancel()
+        self.wallet_job = None
+        self.wallet_timer.stop()
+        self.btn_cancel_refresh.setEnabled(False)
+        if not quiet:
+            self.loading_label.setText("Refresh cancelled.")
+
+    def update_wallet_refresh(self):
+        job = self.wallet_job
+        if job is None:
+            self.wallet_timer.stop()
+            return
+        for kind, payload in job.poll():
+            if kind == "balances":
+                self.wallet_model.set_rows(payload)
+                if not payload:
+                    self.wallet_summary_label.setText("No assets found in wallet.")
+                if self.price_stream is not None:
+                    # Row positions changed; resubscribe for the new holdings
+                    self.start_live_prices()
+            elif kind == "prices":
+                self.wallet_model.update_rows(payload)
+            elif kind == "summary":
+                self.wallet_usd_to_aed = payload["usd_to_aed"]
+                if payload["assets"]:
+                    # An empty wallet keeps its "No assets found" message
+                    self.wallet_summary_label.setText(
+                        f"Total Holdings: AED {payload['total_aed']:,.2f} | Wallet PnL: {payload['avg_pnl']:.2f}%"
+                    )
+                self.loading_label.setText(f"Fetching prices... {payload['priced']} of {payload['assets']}")
+                self.wallet_job_failed = payload.get("failed", {})
+                if "wallets" in payload:
+                    parts = [f"{name}: AED {value:,.2f}" for name, value in payload["wallets"].items()]
+                    parts += [f"{name}: failed" for name in payload["failed"]]
+                    self.wallet_breakdown_label.setText(" | ".join(parts))
+            elif kind == "done":
+                self.record_wallet_snapshot()
+                cache = PRICE_CACHE.stats()
+                self.loading_label.setText(
+                    f"{payload['requests']} requests in {payload['elapsed_ms']:.0f} ms (slowest: {payload['slowest']}, {payload['max_ms']:.0f} ms) | "
+                    f"Price cache: {cache['hits']} hits, {cache['stale_hits']} stale, {cache['misses']} misses"
+                )
+            elif kind == "error":
                 self.loading_label.setText("")
-                self.wallet_summary_label.setText("No assets found in wallet.")
-                self.wallet_table.setRowCount(0)
-                return
+                self.wallet_summary_label.setText(payload)
+                self.wallet_model.clear()
+        if job.done and job.events.empty():
+            self.wallet_job = None
+            self.wallet_timer.stop()
+            self.btn_cancel_refresh.setEnabled(False)
 
-            # Get USD-AED conversion rate
-            try:
-                forex_resp = requests.get("https://api.exchangerate.host/latest?base=USD&symbols=AED")
-                usd_to_aed = forex_resp.json()["rates"]["AED"] if forex_resp.status_code == 200 else 3.67
-            except Exception:
-                usd_to_aed = 3.67  # fallback
-
-            # Prepare table data and summary
-            self.wallet_table.setRowCount(0)
-            total_aed = 0.0
-            total_pnl = 0.0
-            asset_count = 0
-            for b in balances:
-                asset = b['asset']
-                free = float(b['free'])
-                locked = float(b['locked'])
-                total = free + locked
-                if asset == "USDT":
-                    price = 1.0
-                    price_aed = price * usd_to_aed
-                    daily_pnl = 0.0
-                else:
-                    symbol = asset + "USDT"
-                    ticker_url = f"{base_url}/api/v3/ticker/24hr?symbol={symbol}"
-                    ticker_resp = requests.get(ticker_url)
-                    if ticker_resp.status_code == 200:
-                        ticker = ticker_resp.json()
-                        price = float(ticker.get("lastPrice", 0))
-                        price_aed = price * usd_to_aed
-                        daily_pnl = float(ticker.get("priceChangePercent", 0))
-                    else:
-                        price = 0.0
-                        price_aed = 0.0
-                        daily_pnl = 0.0
-                holding_value_aed = total * price_aed
-                total_aed += holding_value_aed
-                total_pnl += daily_pnl
-                asset_count += 1
-                row = self.wallet_table.rowCount()
-                self.wallet_table.insertRow(row)
-                self.wallet_table.setItem(row, 0, QTableWidgetItem(asset))
-                self.wallet_table.setItem(row, 1, QTableWidgetItem(f"{total:.6f}"))
-                self.wallet_table.setItem(row, 2, QTableWidgetItem(f"${price:.2f}"))
-                self.wallet_table.setItem(row, 3, QTableWidgetItem(f"AED {price_aed:.2f}"))
-                self.wallet_table.setItem(row, 4, QTableWidgetItem(f"{daily_pnl:.2f}%"))
-                self.wallet_table.setItem(row, 5, QTableWidgetItem(f"AED {holding_value_aed:.2f}"))
-
-            avg_pnl = total_pnl / asset_count if asset_count > 0 else 0.0
-            self.wallet_summary_label.setText(f"Total Holdings: AED {total_aed:,.2f} | Wallet PnL: {avg_pnl:.2f}%")
-            self.loading_label.setText("")
-        except Exception as e:
-            self.loading_label.setText("")
-            self.wallet_summary_label.setText(f"Error: {e}")
-            self.wallet_table.setRowCount(0)
+    @traced()
+    def record_wallet_snapshot(self):
+        # Only complete refreshes go into the history; a failed wallet or an
+        # unpriced asset would show up as a drop in value
+        if self.wallet_job_name is None:
+            return
+        from binance_client import QUOTE_ASSET
+        unpriced = [row["asset"] for row in self.wallet_model.rows
+                    if row["asset"] != QUOTE_ASSET and not row.get("price")]
+        if self.wallet_job_failed or unpriced:
+            missing = list(self.wallet_job_failed) + unpriced
+            self.wallet_breakdown_label.setText(
+                f"{self.wallet_breakdown_label.text()} | History not recorded (incomplete: {', '.join(missing)})".lstrip(" |"))
+            return
+        try:
+            self.snapshots.append(self.wallet_job_name, self.wallet_model.rows, self.wallet_usd_to_aed)
+        except (OSError, ValueError) as e:
+            self.wallet_breakdown_label.setText(f"Could not record history: {e}")
+
+    @traced()
+    def show_wallet_history(self):
+        name = self.wallet_job_name or self.current_wallet_name
+        interval = self.history_interval_combo.currentText()
+        bars = self.snapshots.ohlc(name, interval) if name else None
+        if bars is None or not len(bars["time"]):
+            QMessageBox.information(self, "Info", "No history recorded for this wallet yet.")
+            return
+        if self.history_win is None:
+            from charts import LineChart
+            self.history_chart = LineChart("Wallet Value", "", "Value (AED)")
+            self.history_win = QWidget()
+            self.history_win.setWindowTitle("Wallet History")
+            layout = QVBoxLayout()
+            self.history_win.setLayout(layout)
+            layout.addWidget(self.history_chart.canvas)
+            self.history_win.resize(700, 500)
+        fmt = "%m-%d %H:00" if interval == "hour" else "%Y-%m-%d"
+        labels = [datetime.fromtimestamp(int(t)).strftime(fmt) for t in bars["time"]]
+        period = {"hour": "Hourly", "day": "Daily", "week": "Weekly"}[interval]
+        self.history_chart.set_title(f"{name}: {period} value")
+        self.history_chart.set_series(
+            np.arange(len(labels)),
+            {"High": bars["high"], "Close": bars["close"], "Low": bars["low"]},
+            styles={"High": {"linestyle": ":"}, "Close": {"linewidth": 2}, "Low": {"linestyle": ":"}},
+            labels=labels,
+        )
+        self.history_win.show()
+        self.history_win.raise_()
+
+    @traced()
+    def toggle_live_prices(self):
+        if self.price_stream is not None:
+            self.stop_live_prices()
+            self.loading_label.setText("Live prices stopped.")
+        elif not self.wallet_model.rows:
+            self.loading_label.setText("Refresh a wallet before starting live prices.")
+        else:
+            self.start_live_prices()
+
+    def start_live_prices(self):
+        from binance_client import QUOTE_ASSET
+        from live_prices import PriceStream
+        self.stop_live_prices()
+        self.live_rows = {
+            row["asset"] + QUOTE_ASSET: i for i, row in enumerate(self.wallet_model.rows) if row["asset"] != QUOTE_ASSET
+        }
+        if not self.live_rows:
+            return
+        self.price_stream = PriceStream(self.live_rows).start()
+        self.live_timer.start(LIVE_FRAME_MS)
+        self.btn_live.setText("Stop Live Prices")
 
+    def stop_live_prices(self):
+        if self.price_stream is None:
+            return
+        self.live_timer.stop()
+        self.price_stream.stop()
+        self.price_stream = None
+        self.btn_live.setText("Start Live Prices")
+
+    def apply_live_prices(self):
+        from binance_client import wallet_summary
+        batch = self.price_stream.drain()
+        if not batch:
+            return
+        rate = self.wallet_usd_to_aed
+        rows = self.wallet_model.rows
+        updates = {}
+        for symbol, (price, pnl) in batch.items():
+            i = self.live_rows.get(symbol)
+            if i is None or i >= len(rows):
+                continue
+            updates[i] = {"price": price, "price_aed": price * rate, "pnl": pnl, "value": rows[i]["total"] * price * rate}
+        self.wallet_model.update_cells(updates)
+        summary = wallet_summary(rows, rate)
+        self.wallet_summary_label.setText(f"Total Holdings: AED {summary['total_aed']:,.2f} | Wallet PnL: {summary['avg_pnl']:.2f}%")
+        self.loading_label.setText(f"Live prices: {self.price_stream.ticks:,} ticks")
+
+    @traced()
     def load_data(self):
-        if os.path.exists(self.json_file):
-            try:
-                with open(self.json_file, "r") as f:
-                    self.data = json.load(f)
-                for d in self.data:
-                    self.add_table_row(d)
-            except Exception:
-                self.data = []
+        # The first chunk is shown straight away; the rest is streamed in
+        # from the event loop so the window paints before the file is read.
+        self.data = Ledger()
+        self.table_model.set_ledger(self.data)
+        self._loader = self.store.iter_load()
+        self._migrate_logs = False
+        self.set_loading(True)
+        self.load_next_chunk()
 
-    def save_data(self):
+    @traced("load_chunk")
+    def load_next_chunk(self):
         try:
-            with open(self.json_file, "w") as f:
-                json.dump(self.data, f)
+            records = next(self._loader)
+        except StopIteration:
+            self._loader = None
+            if self._migrate_logs:
+                # Rewrite once so legacy "Log" strings are dropped from disk
+                self.save_data()
+            self.set_loading(False)
+            return
         except Exception:
-            pass
+            self._loader = None
+            self.data = Ledger()
+            self.table_model.set_ledger(self.data)
+            self.set_loading(False)
+            return
+        # One rowsInserted (or reset) per chunk rather than per entry
+        adds = [record["entry"] for record in records if record["op"] == "add"]
+        if len(adds) == len(records):
+            self.table_model.append(adds)
+        else:
+            for record in records:
+                replay(self.data, record)
+            self.table_model.refresh()
+        self._migrate_logs = self._migrate_logs or any("Log" in entry for entry in adds)
+        QTimer.singleShot(0, self.load_next_chunk)
+
+    def set_loading(self, loading):
+        # Mutations would interleave with the rows still being loaded
+        for button in (self.btn_add, self.btn_delete, self.btn_clear):
+            button.setEnabled(not loading)
+
+    # Writes go through the persistence worker; failures surface in
+    # storage_status_label rather than being dropped.
+
+    def save_data(self):
+        self.compaction_request = None
+        self.persistence.submit("save", self.data.copy())
+
+    def append_data(self, entry):
+        # Journal a single added entry instead of rewriting the whole file
+        self.persistence.submit("add", entry)
+        self.schedule_compaction()
+
+    def remove_data(self, index):
+        self.persistence.submit("delete", index)
+        self.schedule_compaction()
+
+    def schedule_compaction(self):
+        # needs_compaction() only catches up once the worker has written the
+        # queued records, so one request stays outstanding until the store
+        # finishes a compaction or the worker reports an error; otherwise
+        # every mutation past the threshold would queue another full copy
+        if self.compaction_request == (self.store.compactions, self.persistence.errors):
+            return
+        self.compaction_request = None
+        if self.store.needs_compaction():
+            self.compaction_request = (self.store.compactions, self.persistence.errors)
+            self.persistence.submit("compact", self.data.copy())
 
+    @traced()
     def clear_database(self):
-        self.data = []
-        self.table.setRowCount(0)
-        if os.path.exists(self.json_file):
-            os.remove(self.json_file)
+        self.table_model.clear()
+        # A queued compaction is dropped with everything else
+        self.compaction_request = None
+        self.persistence.submit("clear")
 
+    def update_summary(self):
+        totals = self.data.totals()
+        salary = totals["Salary"]
+        rate = (totals["Savings"] + totals["Invested"]) / salary * 100 if salary > 0 else 0
+        self.summary_label.setText(
+            f"Totals - Salary: {salary:,.2f} | Expenses: {totals['Expenses']:,.2f} | "
+            f"Savings: {totals['Savings']:,.2f} | Invested: {totals['Invested']:,.2f} | "
+            f"Saved + Invested: {rate:.2f}%"
+        )
+
+    def update_storage_status(self):
+        stats = self.persistence.stats()
+        if stats["last_error"]:
+            text = f"Save failed: {stats['last_error']}"
+        elif stats["pending"]:
+            text = f"Saving... {stats['pending']} pending write(s)"
+        elif stats["writes"]:
+            text = f"Saved ({stats['last_latency_ms']:.1f} ms, max {stats['max_latency_ms']:.1f} ms)"
+        else:
+            text = ""
+        self.storage_status_label.setText(text)
+
+    def closeEvent(self, event):
+        if self.binance_tab_built:
+            self.cancel_wallet_refresh(quiet=True)
+            self.stop_live_prices()
+        if self.report_job is not None:
+            self.report_job.cancel()
+            self.report_job.wait(timeout=5)
+        if self.simulation_job is not None:
+            self.simulation_job.cancel()
+            self.simulation_job.wait(timeout=5)
+        self.persistence.stop(timeout=10)
+        self.store.close()
+        if self.binance_tab_built:
+            try:
+                PRICE_CACHE.save(PRICE_CACHE_FILE)
+            except OSError:
+                pass
+        super().closeEvent(event)
+
+    @traced()
     def add_data(self):
         try:
-            month = self.entries["Month"].currentText()
-            salary = float(self.entries["Salary"].text())
-            phone = float(self.entries["Phone Bill"].text())
-            petrol = float(self.entries["Petrol Money"].text())
-            annual_rent = float(self.entries["Annual Rent"].text())
-            living = float(self.entries["Living Expenses"].text())
-            debt_amt = float(self.entries["Debt Amount"].text())
-            debt_type = "personal" if self.rb_personal.isChecked() else "housing"
-
-            monthly_rent = annual_rent / 12
-            term = 4 if debt_type == "personal" else 25
-            interest_rate = 7.49 / 100
-            months = term * 12
-            monthly_interest = interest_rate / 12
-            if monthly_interest > 0:
-                monthly_debt = (debt_amt * monthly_interest * (1 + monthly_interest) ** months) / ((1 + monthly_interest) ** months - 1)
-            else:
-                monthly_debt = debt_amt / months
-
-            total_expenses = phone + petrol + monthly_rent + living + monthly_debt
-            remaining = salary - total_expenses
-            savings_pct = (remaining / salary * 100) if salary > 0 else 0
-            savings = remaining * (savings_pct / 100) if savings_pct > 0 else 0
-            investable = remaining - savings
-
-            log = (
-                f"Month: {month}\n"
-                f"Salary: {salary:.2f}\n"
-                f"Phone Bill: {phone:.2f}\n"
-                f"Petrol Money: {petrol:.2f}\n"
-                f"Annual Rent: {annual_rent:.2f}\n"
-                f"Monthly Rent: {monthly_rent:.2f}\n"
-                f"Living Expenses: {living:.2f}\n"
-                f"Debt Amount: {debt_amt:.2f}\n"
-                f"Debt Type: {debt_type}\n"
-                f"Debt Term (years): {term}\n"
-                f"Interest Rate: {interest_rate*100:.2f}%\n"
-                f"Monthly Debt Payment: {monthly_debt:.2f}\n"
-                f"Total Expenses: {total_expenses:.2f}\n"
-                f"Remaining after Expenses: {remaining:.2f}\n"
-                f"Savings %: {savings_pct:.2f}\n"
-                f"Savings: {savings:.2f}\n"
-                f"Invested: {investable:.2f}\n"
-            )
-            entry = {
-                "Month": month,
-                "Salary": salary,
-                "Expenses": total_expenses,
-                "Savings": savings,
-                "Invested": investable,
-                "Log": log
-            }
-            self.data.append(entry)
-            self.add_table_row(entry)
-            self.savings_pct_label.setText(f"{savings_pct:.2f}")
-            self.save_data()
+            with TRACER.span("parse"):
+                empty = [key for key in INPUT_KEYS if not self.entries[key].text()]
+                if empty:
+                    raise ValueError(f"missing {', '.join(empty)}")
+                self.sync_month_calc()
+            # Reuses whatever the preview already computed for these inputs.
+            # The log text is rendered from the entry's inputs by show_logs
+            with TRACER.span("calculate"):
+                entry, savings_pct = self.month_calc.entry(self.entries["Month"].currentText())
+            with TRACER.span("table"):
+                self.table_model.append([entry])
+                self.savings_pct_label.setText(f"{savings_pct:.2f}")
+            with TRACER.span("journal"):
+                self.append_data(entry)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Invalid input: {e}")
 
-    def add_table_row(self, d):
-        row = self.table.rowCount()
-        self.table.insertRow(row)
-        self.table.setItem(row, 0, QTableWidgetItem(str(d["Month"])))
-        self.table.setItem(row, 1, QTableWidgetItem(f"{d['Salary']:.2f}"))
-        self.table.setItem(row, 2, QTableWidgetItem(f"{d['Expenses']:.2f}"))
-        self.table.setItem(row, 3, QTableWidgetItem(f"{d['Savings']:.2f}"))
-        self.table.setItem(row, 4, QTableWidgetItem(f"{d['Invested']:.2f}"))
+    def current_debt_type(self):
+        return "personal" if self.rb_personal.isChecked() else "housing"
+
+    def sync_month_calc(self):
+        # Only fields that differ from the graph's inputs mark anything dirty
+        self.month_calc.set_fields({key: self.entries[key].text() for key in INPUT_KEYS}, self.current_debt_type())
+
+    def preview_input_changed(self, key, value):
+        if self.month_calc.set(key, value) and not self.preview_timer.isActive():
+            self.preview_timer.start()
 
+    @traced()
     def update_savings_pct(self):
         try:
-            salary = float(self.entries["Salary"].text()) if self.entries["Salary"].text() else 0
-            phone = float(self.entries["Phone Bill"].text()) if self.entries["Phone Bill"].text() else 0
-            petrol = float(self.entries["Petrol Money"].text()) if self.entries["Petrol Money"].text() else 0
-            annual_rent = float(self.entries["Annual Rent"].text()) if self.entries["Annual Rent"].text() else 0
-            living = float(self.entries["Living Expenses"].text()) if self.entries["Living Expenses"].text() else 0
-            debt_amt = float(self.entries["Debt Amount"].text()) if self.entries["Debt Amount"].text() else 0
-            debt_type = "personal" if self.rb_personal.isChecked() else "housing"
-            monthly_rent = annual_rent / 12 if annual_rent else 0
-            term = 4 if debt_type == "personal" else 25
-            interest_rate = 7.49 / 100
-            months = term * 12
-            monthly_interest = interest_rate / 12
-            if monthly_interest > 0 and months > 0:
-                monthly_debt = (debt_amt * monthly_interest * (1 + monthly_interest) ** months) / ((1 + monthly_interest) ** months - 1)
-            elif months > 0:
-                monthly_debt = debt_amt / months
-            else:
-                monthly_debt = 0
-            total_expenses = phone + petrol + monthly_rent + living + monthly_debt
-            remaining = salary - total_expenses
-            savings_pct = (remaining / salary * 100) if salary > 0 else 0
-            self.savings_pct_label.setText(f"{savings_pct:.2f}")
+            text = f"{self.month_calc.get('savings_pct'):.2f}"
         except Exception:
-            self.savings_pct_label.setText("0.00")
+            text = "0.00"
+        if self.savings_pct_label.text() != text:
+            self.savings_pct_label.setText(text)
 
 
+    @traced()
     def show_logs(self):
         if not self.data:
             QMessageBox.information(self, "Info", "No logs to show.")
@@ -522,117 +823,306 @@ class FinanceApp(QMainWindow):
         layout = QVBoxLayout(self.log_win)
         text = QTextEdit()
         text.setReadOnly(True)
-        for i, d in enumerate(self.data):
-            text.append(f"Entry {i+1}:\n{d['Log']}\n{'-'*50}\n")
+        for i in range(len(self.data)):
+            text.append(f"Entry {i+1}:\n{self.data.log_text(i)}\n{'-'*50}\n")
         layout.addWidget(text)
         self.log_win.show()
         self.log_win.raise_()
 
+    @traced()
     def delete_entry(self):
-        row = self.table.currentRow()
+        row = self.table.currentIndex().row()
         if row < 0:
             QMessageBox.information(self, "Info", "No entry selected to delete.")
             return
-        self.table.removeRow(row)
-        del self.data[row]
-        self.save_data()
+        self.table_model.remove(row)
+        self.remove_data(row)
 
+    @traced()
     def show_chart(self):
         if not self.data:
             QMessageBox.information(self, "Info", "No data to plot.")
             return
-        months = [d["Month"] for d in self.data]
-        expenses = [d["Expenses"] for d in self.data]
-        savings = [d["Savings"] for d in self.data]
-        invested = [d["Invested"] for d in self.data]
-
-        x = list(range(len(months)))
-        fig, ax = plt.subplots(figsize=(6, 4))
-        ax.plot(x, expenses, label="Expenses")
-        ax.plot(x, savings, label="Savings")
-        ax.plot(x, invested, label="Invested")
-        ax.set_xlabel("Month")
-        ax.set_ylabel("Amount")
-        ax.set_title("Monthly Finance Overview")
-        ax.set_xticks(x)
-        ax.set_xticklabels(months, rotation=45)
-        ax.legend()
-        ax.grid(True)
-        plt.tight_layout()
-
-        # Remove old canvas if exists
-        if hasattr(self, 'chart_canvas') and self.chart_canvas is not None:
-            self.chart_canvas.setParent(None)
-            self.chart_canvas = None
-
-        self.chart_win = QWidget()
-        self.chart_win.setWindowTitle("Finance Chart")
-        layout = QVBoxLayout()
-        self.chart_win.setLayout(layout)
-        self.chart_canvas = FigureCanvas(fig)
-        layout.addWidget(self.chart_canvas)
-        self.chart_win.resize(700, 500)
+        # One window and figure for the app's lifetime, updated in place
+        if self.chart_win is None:
+            with TRACER.span("create"):
+                from charts import LineChart
+                self.chart_view = LineChart("Monthly Finance Overview", "Month", "Amount")
+                self.chart_win = QWidget()
+                self.chart_win.setWindowTitle("Finance Chart")
+                layout = QVBoxLayout()
+                self.chart_win.setLayout(layout)
+                layout.addWidget(self.chart_view.canvas)
+                self.chart_win.resize(700, 500)
+        with TRACER.span("plot"):
+            totals = self.data.totals()
+            self.chart_view.set_series(
+                np.arange(len(self.data)),
+                {key: self.data.column(key) for key in ("Expenses", "Savings", "Invested")},
+                labels=self.data.labels("Month"),
+                legend={key: f"{key} (total {totals[key]:,.0f})" for key in ("Expenses", "Savings", "Invested")},
+            )
         self.chart_win.show()
         self.chart_win.raise_()
 
+    @traced()
     def show_growth_graph(self):
         try:
             cagr = float(self.cagr_entry.text()) / 100
             period = int(self.period_entry.text())
-            invested_monthly = [d["Invested"] for d in self.data]
-            if not invested_monthly or period <= 0:
+            invested_monthly = self.data.column("Invested")
+            if not len(invested_monthly) or period <= 0:
                 QMessageBox.information(self, "Info", "No investment data or invalid period.")
                 return
-            growth = []
-            invested_cumulative = []
-            total = 0
-            invested_total = 0
-            for month in range(period):
-                if month < len(invested_monthly):
-                    total += invested_monthly[month]
-                    invested_total += invested_monthly[month]
-                total *= (1 + cagr / 12)
-                growth.append(total)
-                invested_cumulative.append(invested_total)
-            fig, ax = plt.subplots(figsize=(6, 4))
-            ax.plot(range(1, period+1), invested_cumulative, label="Total Invested", linestyle="--")
-            ax.plot(range(1, period+1), growth, label="Actual Value", linewidth=2)
+            def compute():
+                contributions = contribution_schedule(invested_monthly, period)
+                return growth_series(contributions, cagr), np.cumsum(contributions)
+            with TRACER.span("compute"):
+                growth, invested_cumulative = self.growth_cache.get(
+                    ("series", cagr, period, self.data.version), compute
+                )
+            with TRACER.span("plot"):
+                self.get_growth_chart().set_series(
+                    np.arange(1, period + 1),
+                    {"Total Invested": invested_cumulative, "Actual Value": growth},
+                    styles={"Total Invested": {"linestyle": "--"}, "Actual Value": {"linewidth": 2}},
+                )
+            self.final_value_label.setText(f"{growth[-1]:.2f}" if len(growth) else "0.00")
+            self.total_invested_label.setText(f"{invested_cumulative[-1]:.2f}" if len(invested_cumulative) else "0.00")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Growth graph error: {e}")
+
+    def get_growth_chart(self):
+        # The growth tab keeps a single canvas for all of its plots
+        if self.growth_chart is None:
+            from charts import LineChart
+            self.growth_chart = LineChart("Investment Growth Over Time", "Month", "Value")
+            self.tab_growth.layout().addWidget(self.growth_chart.canvas)
+        return self.growth_chart
+
+    def parse_sweep_values(self, text):
+        # Comma-separated values, or start:stop:step (inclusive)
+        text = text.strip()
+        if ":" in text:
+            parts = text.split(":")
+            if len(parts) != 3:
+                raise ValueError(f"'{text}' is not start:stop:step")
+            start, stop, step = (float(v) for v in parts)
+            if not all(np.isfinite([start, stop, step])):
+                raise ValueError(f"'{text}' has a non-finite value")
+            if step <= 0:
+                raise ValueError(f"the step in '{text}' must be greater than 0")
+            if stop < start:
+                raise ValueError(f"the stop in '{text}' is below the start")
+            if (stop - start) / step + 1 > MAX_SWEEP_VALUES:
+                raise ValueError(f"'{text}' gives more than {MAX_SWEEP_VALUES} values")
+            return list(np.arange(start, stop + step / 2, step))
+        return [float(v) for v in text.split(",") if v.strip()]
+
+    @traced()
+    def show_growth_sweep(self):
+        try:
+            cagrs = tuple(v / 100 for v in self.parse_sweep_values(self.sweep_cagr_entry.text()))
+            periods = tuple(int(v) for v in self.parse_sweep_values(self.sweep_period_entry.text()))
+        except ValueError as e:
+            QMessageBox.warning(self, "Warning", f"Invalid sweep values: {e}")
+            return
+        try:
+            invested_monthly = self.data.column("Invested")
+            if not len(invested_monthly) or not cagrs or not periods or min(periods) <= 0:
+                QMessageBox.information(self, "Info", "No investment data or invalid sweep values.")
+                return
+            grid = self.growth_cache.get(
+                ("sweep", cagrs, periods, self.data.version),
+                lambda: sweep(invested_monthly, cagrs, periods)
+            )
+            chart = self.get_growth_chart()
+            ax = chart.begin_custom()
+            image = ax.imshow(grid, aspect="auto", origin="lower", cmap="viridis")
+            ax.set_xticks(range(len(periods)))
+            ax.set_xticklabels([str(p) for p in periods], rotation=45)
+            ax.set_yticks(range(len(cagrs)))
+            ax.set_yticklabels([f"{c * 100:g}%" for c in cagrs])
+            ax.set_xlabel("Period (months)")
+            ax.set_ylabel("CAGR")
+            ax.set_title("Final Value by CAGR and Period")
+            if grid.size <= 150:
+                for (i, j), value in np.ndenumerate(grid):
+                    ax.text(j, i, f"{value:,.0f}", ha="center", va="center", fontsize=7, color="white")
+            chart.figure.colorbar(image, ax=ax)
+            chart.redraw()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Sweep error: {e}")
+
+    @traced()
+    def show_growth_simulation(self):
+        try:
+            cagr = float(self.cagr_entry.text()) / 100
+            period = int(self.period_entry.text())
+            volatility = float(self.volatility_entry.text()) / 100
+            n_paths = int(self.paths_entry.text())
+            seed = int(self.seed_entry.text()) if self.seed_entry.text().strip() else None
+            invested_monthly = self.data.column("Invested")
+            if not len(invested_monthly) or period <= 0 or n_paths <= 0:
+                QMessageBox.information(self, "Info", "No investment data, invalid period or path count.")
+                return
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Simulation error: {e}")
+            return
+        # A newer run supersedes the one in progress
+        if self.simulation_job is not None:
+            self.simulation_job.cancel()
+        self.simulation_job = SimulationJob(
+            invested_monthly, cagr, period, volatility=volatility, n_paths=n_paths,
+            seed=seed, processes=os.cpu_count() if period >= POOL_MIN_MONTHS else None
+        ).start()
+        self.simulated_value_label.setText("Simulating...")
+        self.simulation_timer.start(50)
+
+    def update_simulation(self):
+        job = self.simulation_job
+        if job is None:
+            self.simulation_timer.stop()
+            return
+        if not job.done:
+            return
+        self.simulation_timer.stop()
+        self.simulation_job = None
+        if job.error:
+            self.simulated_value_label.setText("-")
+            QMessageBox.critical(self, "Error", f"Simulation error: {job.error}")
+            return
+        if job.result is None:
+            return
+        self.show_simulation_result(job.result, job.kwargs["n_paths"], job.kwargs["seed"])
+
+    @traced()
+    def show_simulation_result(self, result, n_paths, seed):
+        try:
+            months, bands = result["months"], result["bands"]
+            chart = self.get_growth_chart()
+            ax = chart.begin_custom()
+            ax.fill_between(months, bands[5], bands[95], alpha=0.3, label="p5 - p95")
+            ax.plot(months, bands[50], label="Median", linewidth=2)
+            ax.plot(months, result["invested"], label="Total Invested", linestyle="--")
             ax.set_xlabel("Month")
             ax.set_ylabel("Value")
-            ax.set_title("Investment Growth Over Time")
+            ax.set_title(f"Simulated Growth ({n_paths} paths, seed {result['seed']})")
             ax.legend()
             ax.grid(True)
-            plt.tight_layout()
-            # Remove all previous FigureCanvas widgets from layout except the form
-            layout = self.tab_growth.layout()
-            for i in reversed(range(layout.count())):
-                widget = layout.itemAt(i).widget()
-                if isinstance(widget, FigureCanvasQTAgg):
-                    layout.removeWidget(widget)
-                    widget.setParent(None)
-            self.growth_canvas = FigureCanvas(fig)
-            layout.addWidget(self.growth_canvas)
-            self.final_value_label.setText(f"{growth[-1]:.2f}" if growth else "0.00")
-            self.total_invested_label.setText(f"{invested_cumulative[-1]:.2f}" if invested_cumulative else "0.00")
+            chart.redraw()
+            final = result["final"]
+            self.simulated_value_label.setText(f"{final[5]:.2f} / {final[50]:.2f} / {final[95]:.2f}")
+            self.total_invested_label.setText(f"{result['invested'][-1]:.2f}")
+            if seed is None:
+                self.seed_entry.setText(str(result["seed"]))
         except Exception as e:
-            QMessageBox.critical(self, "Error", f"Growth graph error: {e}")
+            QMessageBox.critical(self, "Error", f"Simulation error: {e}")
+
+    def show_diagnostics(self):
+        # The tracer's latest spans, refreshed while the window is open
+        if self.diagnostics_win is None:
+            self.diagnostics_win = QWidget()
+            self.diagnostics_win.setWindowTitle("Diagnostics")
+            self.diagnostics_win.resize(800, 500)
+            layout = QVBoxLayout(self.diagnostics_win)
+            controls = QHBoxLayout()
+            self.trace_checkbox = QCheckBox("Record spans")
+            self.trace_memory_checkbox = QCheckBox("Track memory (tracemalloc)")
+            for checkbox in (self.trace_checkbox, self.trace_memory_checkbox):
+                checkbox.setStyleSheet("color: #ffffff;")
+                controls.addWidget(checkbox)
+            btn_clear_spans = QPushButton("Clear")
+            controls.addWidget(btn_clear_spans)
+            layout.addLayout(controls)
+            self.span_model = SpanTableModel()
+            span_table = QTableView()
+            span_table.setModel(self.span_model)
+            span_table.horizontalHeader().setStretchLastSection(True)
+            layout.addWidget(span_table)
+            self.diagnostics_label = QLabel("")
+            self.diagnostics_label.setStyleSheet("font-size: 12px; color: #888;")
+            layout.addWidget(self.diagnostics_label)
+            self.trace_checkbox.setChecked(TRACER.enabled)
+            self.trace_memory_checkbox.setChecked(TRACER.memory or not TRACER.enabled)
+            self.trace_checkbox.toggled.connect(self.set_tracing)
+            self.trace_memory_checkbox.toggled.connect(self.set_tracing)
+            btn_clear_spans.clicked.connect(self.clear_diagnostics)
+            self.diagnostics_seen = None
+            self.diagnostics_timer = QTimer(self)
+            self.diagnostics_timer.timeout.connect(self.update_diagnostics)
+        self.update_diagnostics()
+        self.diagnostics_timer.start(500)
+        self.diagnostics_win.show()
+        self.diagnostics_win.raise_()
+
+    def set_tracing(self):
+        if self.trace_checkbox.isChecked():
+            TRACER.enable(memory=self.trace_memory_checkbox.isChecked())
+        else:
+            TRACER.disable()
+        self.update_diagnostics()
 
+    def clear_diagnostics(self):
+        TRACER.clear()
+        self.diagnostics_seen = None
+        self.update_diagnostics()
+
+    def update_diagnostics(self):
+        if not self.diagnostics_win.isVisible() and self.diagnostics_seen is not None:
+            self.diagnostics_timer.stop()
+            return
+        if TRACER.recorded != self.diagnostics_seen:
+            self.diagnostics_seen = TRACER.recorded
+            self.span_model.set_spans(TRACER.recent(DIAGNOSTIC_ROWS))
+        if TRACER.enabled:
+            memory = "with" if TRACER.memory else "without"
+            self.diagnostics_label.setText(
+                f"Tracing {memory} memory | {TRACER.recorded:,} spans recorded | metrics: {os.path.abspath(TRACER.path)}"
+            )
+        else:
+            self.diagnostics_label.setText("Tracing is off (set FINANCE_TRACE=1 to start with it on)")
+
+    @traced()
     def export_pdf(self):
         if not self.data:
             QMessageBox.information(self, "Info", "No data to export.")
             return
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-        pdf.cell(200, 10, txt="Personal Finance Report", ln=True, align="C")
-        pdf.ln(10)
-        for d in self.data:
-            pdf.cell(0, 10, txt=f"Month: {d['Month']}, Salary: {d['Salary']:.2f}, Expenses: {d['Expenses']:.2f}, Savings: {d['Savings']:.2f}, Invested: {d['Invested']:.2f}", ln=True)
-        try:
-            pdf.output("finance_report.pdf")
-            QMessageBox.information(self, "Success", "PDF exported as finance_report.pdf")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"PDF export failed: {e}")
+        if self.report_job is not None:
+            QMessageBox.information(self, "Info", "A report is already being generated.")
+            return
+        with TRACER.span("dialog"):
+            path, _ = QFileDialog.getSaveFileName(self, "Export PDF", "finance_report.pdf", "PDF files (*.pdf)")
+        if not path:
+            return
+        # The report is written on a worker thread (its phases are traced
+        # there); poll it like the storage status
+        with TRACER.span("start"):
+            from report import ReportJob
+            self.report_job = ReportJob(self.data, path).start()
+        self.report_progress = QProgressDialog("Generating PDF report...", "Cancel", 0, max(1, self.report_job.total), self)
+        self.report_progress.setWindowTitle("Export PDF")
+        self.report_progress.setMinimumDuration(300)
+        self.report_progress.canceled.connect(self.report_job.cancel)
+        self.report_timer.start(100)
+
+    def update_report_progress(self):
+        job = self.report_job
+        if job is None:
+            self.report_timer.stop()
+            return
+        written, total = job.progress()
+        if not job.done:
+            self.report_progress.setLabelText(f"Generating PDF report... {written:,} of {total:,} rows")
+            self.report_progress.setValue(written)
+            return
+        self.report_timer.stop()
+        self.report_job = None
+        self.report_progress.reset()
+        if job.error:
+            QMessageBox.critical(self, "Error", f"PDF export failed: {job.error}")
+        elif not job.cancelled:
+            QMessageBox.information(self, "Success", f"PDF exported as {os.path.basename(job.path)} ({job.pages} pages)")
 
 if __name__ == "__main__":
     from ui import setup_main_tabs
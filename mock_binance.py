@@ -0,0 +1,245 @@
+# mock_binance.py
+# Contains a local stand-in for the Binance REST endpoints and the FX rate,
+# for exercising the wallet dashboard without network access or API keys.
+#
+#   python mock_binance.py --port 8765 --assets 40 --latency 0.05 --stream-port 8766
+#   BINANCE_BASE_URL=http://127.0.0.1:8765 FX_URL=http://127.0.0.1:8765/fx \
+#   BINANCE_WS_URL=ws://127.0.0.1:8766 python main_qt.py
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import socketserver
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def make_market(n_assets, seed=0):
+    # {asset: (balance, price, change %)}; USDT is always held
+    rng = random.Random(seed)
+    market = {"USDT": (round(rng.uniform(10, 5000), 2), 1.0, 0.0)}
+    for i in range(n_assets - 1):
+        market[f"A{i:03d}"] = (round(rng.uniform(0.01, 100), 6), round(rng.uniform(0.01, 60000), 4),
+                               round(rng.uniform(-10, 10), 2))
+    return market
+
+
+class MockBinanceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, n_assets=40, latency=0.0, seed=0, usd_to_aed=3.6725):
+        super().__init__(("127.0.0.1", port), MockHandler)
+        self.market = make_market(n_assets, seed)
+        self.latency = latency
+        self.usd_to_aed = usd_to_aed
+        self.requests = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        # Serve on a background thread, for use from scripts
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-binance", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def balances(self, api_key):
+        # Each API key sees its own seeded subset of the market's assets
+        rng = random.Random(api_key)
+        return [{"asset": a, "free": str(round(q * rng.uniform(0.1, 2), 6)), "locked": "0.0"}
+                for a, (q, _, _) in self.market.items() if a == "USDT" or rng.random() < 0.6]
+
+    def ticker(self, symbol):
+        asset = symbol[:-4] if symbol.endswith("USDT") else None
+        if asset not in self.market or asset == "USDT":
+            return None
+        _, price, change = self.market[asset]
+        return {"symbol": symbol, "lastPrice": str(price), "priceChangePercent": str(change)}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with server._lock:
+            server.requests.append(url.path)
+        if server.latency:
+            time.sleep(server.latency)
+        if url.path == "/api/v3/account":
+            api_key = self.headers.get("X-MBX-APIKEY")
+            if "signature" not in query or not api_key or api_key.startswith("invalid"):
+                return self._send(401, {"code": -2015, "msg": "Invalid API-key, IP, or permissions for action."})
+            return self._send(200, {"balances": server.balances(api_key)})
+        if url.path == "/api/v3/ticker/24hr":
+            if "symbols" in query:
+                tickers = [server.ticker(s) for s in json.loads(query["symbols"])]
+                if None in tickers:
+                    return self._send(400, {"code": -1121, "msg": "Invalid symbol."})
+                return self._send(200, tickers)
+            ticker = server.ticker(query.get("symbol", ""))
+            if ticker is None:
+                return self._send(400, {"code": -1121, "msg": "Invalid symbol."})
+            return self._send(200, ticker)
+        if url.path == "/fx":
+            return self._send(200, {"base": "USD", "rates": {"AED": server.usd_to_aed}})
+        self._send(404, {"msg": "not found"})
+
+
+def ws_frame(text):
+    # Unmasked text frame, as a server sends them
+    payload = text.encode()
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x81, n)
+    elif n < 1 << 16:
+        header = struct.pack("!BBH", 0x81, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x81, 127, n)
+    return header + payload
+
+
+def ticker_message(symbol, price, change):
+    # The combined-stream envelope Binance uses for <symbol>@ticker
+    return json.dumps({"stream": f"{symbol.lower()}@ticker",
+                       "data": {"e": "24hrTicker", "E": int(time.time() * 1000), "s": symbol,
+                                "c": f"{price:.8f}", "P": f"{change:.3f}"}})
+
+
+class MockStreamServer(socketserver.ThreadingTCPServer):
+    # Minimal websocket server speaking the Binance combined-stream format.
+    # It either replays a recording (one message per line, looped) or
+    # random-walks the prices of the given market, at `rate` ticks a second
+    # spread over the symbols each client subscribed to.
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0, market=None, rate=100.0, replay=None, seed=0):
+        super().__init__(("127.0.0.1", port), StreamHandler)
+        self.market = market or make_market(40, seed)
+        self.rate = rate
+        self.recording = None
+        if replay:
+            with open(replay, "r") as f:
+                self.recording = [line.strip() for line in f if line.strip()]
+        self.seed = seed
+        self.sent = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def messages(self, symbols):
+        if self.recording:
+            while True:
+                yield from self.recording
+        rng = random.Random(self.seed)
+        state = {}
+        for symbol in symbols:
+            asset = symbol[:-4]
+            if asset in self.market and asset != "USDT":
+                state[symbol] = [self.market[asset][1], self.market[asset][2]]
+        names = sorted(state)
+        if not names:
+            return
+        while True:
+            symbol = rng.choice(names)
+            price = state[symbol]
+            price[0] *= 1 + rng.gauss(0, 0.0005)
+            price[1] += rng.gauss(0, 0.01)
+            yield ticker_message(symbol, price[0], price[1])
+
+
+class StreamHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request_line = self.rfile.readline().decode()
+        headers = {}
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        path = request_line.split(" ")[1] if " " in request_line else "/"
+        key = headers.get("sec-websocket-key")
+        if not key:
+            self.wfile.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        self.wfile.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                          f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        streams = parse_qs(urlparse(path).query).get("streams", [""])[0]
+        symbols = [s.split("@")[0].upper() for s in streams.split("/") if s]
+        interval = 1.0 / self.server.rate if self.server.rate > 0 else 0
+        next_send = time.monotonic()
+        try:
+            for message in self.server.messages(symbols):
+                self.wfile.write(ws_frame(message))
+                self.server.sent += 1
+                next_send += interval
+                delay = next_send - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+        except OSError:
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve mock Binance and FX endpoints locally.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--assets", type=int, default=40, help="number of assets listed (including USDT); "
+                        "each API key holds a subset, and keys starting with 'invalid' are rejected")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stream-port", type=int, default=None, help="also serve the ticker websocket stream")
+    parser.add_argument("--ticks-per-second", type=float, default=100.0)
+    parser.add_argument("--replay", help="file of recorded stream messages, one per line, to replay in a loop")
+    args = parser.parse_args(argv)
+    server = MockBinanceServer(args.port, args.assets, args.latency, args.seed)
+    print(f"Mock Binance on {server.url} (FX at {server.url}/fx)")
+    if args.stream_port is not None:
+        stream = MockStreamServer(args.stream_port, server.market, args.ticks_per_second, args.replay, args.seed).start()
+        print(f"Ticker stream on {stream.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
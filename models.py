@@ -0,0 +1,200 @@
+# models.py
+# Contains the Qt table models backing the finance and wallet views
+
+import time
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from ledger import Ledger
+
+LEDGER_COLUMNS = ["Month", "Salary", "Expenses", "Savings", "Invested"]
+
+WALLET_COLUMNS = [
+    ("asset", "Asset", "{}"),
+    ("total", "Total", "{:.6f}"),
+    ("price", "Price (USD)", "${:.2f}"),
+    ("price_aed", "Price (AED)", "AED {:.2f}"),
+    ("pnl", "Daily PnL (%)", "{:.2f}%"),
+    ("value", "Holding Value (AED)", "AED {:.2f}"),
+]
+
+SPAN_COLUMNS = [
+    ("start", "Time", "{}"),
+    ("span", "Span", "{}"),
+    ("wall_ms", "Wall (ms)", "{:.2f}"),
+    ("cpu_ms", "CPU (ms)", "{:.2f}"),
+    ("alloc_kb", "Alloc (KB)", "{:+.1f}"),
+    ("peak_kb", "Peak (KB)", "{:.1f}"),
+    ("thread", "Thread", "{}"),
+]
+
+
+class LedgerTableModel(QAbstractTableModel):
+    # Cells are formatted straight from the ledger columns when the view asks
+    # for them, so only the visible rows are ever turned into strings.
+
+    def __init__(self, ledger=None, parent=None):
+        super().__init__(parent)
+        self.ledger = ledger if ledger is not None else Ledger()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.ledger)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(LEDGER_COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        key = LEDGER_COLUMNS[index.column()]
+        value = self.ledger.value(index.row(), key)
+        if value is None:
+            return ""
+        return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return LEDGER_COLUMNS[section]
+        return str(section + 1)
+
+    def set_ledger(self, ledger):
+        self.beginResetModel()
+        self.ledger = ledger
+        self.endResetModel()
+
+    def refresh(self):
+        # For bulk changes that were applied to the ledger directly
+        self.beginResetModel()
+        self.endResetModel()
+
+    def append(self, entries):
+        entries = list(entries)
+        if not entries:
+            return
+        first = len(self.ledger)
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        self.ledger.extend(entries)
+        self.endInsertRows()
+
+    def remove(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.ledger.delete(row)
+        self.endRemoveRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.ledger.clear()
+        self.endResetModel()
+
+
+class WalletTableModel(QAbstractTableModel):
+    # Rows are dicts keyed like WALLET_COLUMNS; missing values show blank
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(WALLET_COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.ToolTipRole and index.isValid():
+            # Rows merged from several wallets list each wallet's share
+            breakdown = self.rows[index.row()].get("breakdown")
+            return "\n".join(f"{name}: {total:.6f}" for name, total in breakdown.items()) if breakdown else None
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        key, _, fmt = WALLET_COLUMNS[index.column()]
+        value = self.rows[index.row()].get(key)
+        return "" if value is None else fmt.format(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return WALLET_COLUMNS[section][1]
+        return str(section + 1)
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = list(rows)
+        self.endResetModel()
+
+    def update_rows(self, updates):
+        # updates: {row index: values}; one dataChanged for the touched span
+        if not updates:
+            return
+        for i, values in updates.items():
+            self.rows[i].update(values)
+        top, bottom = min(updates), max(updates)
+        self.dataChanged.emit(self.index(top, 0), self.index(bottom, len(WALLET_COLUMNS) - 1))
+
+    def update_cells(self, updates):
+        # updates: {row index: values}; only values that actually changed are
+        # stored, and each row repaints just the span of its changed columns
+        for i, values in updates.items():
+            row = self.rows[i]
+            changed = [c for c, (key, _, _) in enumerate(WALLET_COLUMNS) if key in values and row.get(key) != values[key]]
+            if not changed:
+                continue
+            row.update(values)
+            self.dataChanged.emit(self.index(i, changed[0]), self.index(i, changed[-1]), [Qt.DisplayRole])
+
+    def append_rows(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+    def clear(self):
+        self.set_rows([])
+
+
+class SpanTableModel(QAbstractTableModel):
+    # Finished tracing spans (tracing.Tracer.recent()), newest first
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.spans = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.spans)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(SPAN_COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        span = self.spans[index.row()]
+        if role == Qt.ToolTipRole:
+            return f"Raised {span['error']}" if "error" in span else None
+        if role != Qt.DisplayRole:
+            return None
+        key, _, fmt = SPAN_COLUMNS[index.column()]
+        value = span.get(key)
+        if value is None:
+            return ""
+        if key == "start":
+            return time.strftime("%H:%M:%S", time.localtime(value)) + f".{int(value * 1000) % 1000:03d}"
+        return fmt.format(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return SPAN_COLUMNS[section][1]
+        return str(section + 1)
+
+    def set_spans(self, spans):
+        self.beginResetModel()
+        self.spans = list(spans)
+        self.endResetModel()
@@ -0,0 +1,126 @@
+# persistence.py
+# Contains the background worker that writes ledger changes to disk
+
+import threading
+import time
+
+from tracing import TRACER
+
+COALESCE_DELAY = 0.05
+
+
+class PersistenceWorker:
+    # Mutations are queued from the GUI thread and a single worker thread
+    # writes them out. Anything that arrives within COALESCE_DELAY of the
+    # first pending change goes to disk in the same batch, and a full save or
+    # clear supersedes everything queued before it.
+
+    def __init__(self, store, coalesce_delay=COALESCE_DELAY):
+        self.store = store
+        self.coalesce_delay = coalesce_delay
+        self._pending = []
+        self._in_flight = 0
+        self._dirty = threading.Condition()
+        self._stopping = False
+        self.writes = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._thread = threading.Thread(target=self._run, name="ledger-persistence", daemon=True)
+        self._thread.start()
+
+    def submit(self, op, payload=None):
+        # op is "add", "delete", "save", "clear" or "compact"
+        with self._dirty:
+            if op in ("save", "clear"):
+                self._pending.clear()
+            self._pending.append((op, payload))
+            self._dirty.notify_all()
+
+    @property
+    def pending(self):
+        with self._dirty:
+            return len(self._pending) + self._in_flight
+
+    def stats(self):
+        return {
+            "pending": self.pending,
+            "writes": self.writes,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "last_latency_ms": self.last_latency * 1000,
+            "max_latency_ms": self.max_latency * 1000,
+        }
+
+    def flush(self, timeout=None):
+        # Block until everything submitted so far is on disk
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._dirty:
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._dirty.wait(remaining)
+        return True
+
+    def stop(self, timeout=None):
+        self.flush(timeout)
+        with self._dirty:
+            self._stopping = True
+            self._dirty.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._dirty:
+                while not self._pending and not self._stopping:
+                    self._dirty.wait()
+                if self._stopping and not self._pending:
+                    return
+            # Let the rest of a burst arrive before writing
+            time.sleep(self.coalesce_delay)
+            with self._dirty:
+                batch = self._pending
+                self._pending = []
+                self._in_flight = len(batch)
+            started = time.perf_counter()
+            try:
+                with TRACER.span("persist"):
+                    self._write(batch)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+            else:
+                self.last_error = None
+                self.writes += 1
+            self.last_latency = time.perf_counter() - started
+            self.max_latency = max(self.max_latency, self.last_latency)
+            with self._dirty:
+                self._in_flight = 0
+                self._dirty.notify_all()
+
+    def _compaction_failed(self, error):
+        # Called from the store's compaction thread
+        with self._dirty:
+            self.errors += 1
+            self.last_error = f"compaction: {error}"
+
+    def _write(self, batch):
+        records = []
+        for op, payload in batch:
+            if op in ("add", "delete"):
+                key = "entry" if op == "add" else "index"
+                records.append({"op": op, key: payload})
+                continue
+            if records:
+                self.store.write_batch(records)
+                records = []
+            if op == "save":
+                self.store.save(payload)
+            elif op == "clear":
+                self.store.clear()
+            elif op == "compact":
+                self.store.compact(payload, on_error=self._compaction_failed)
+        if records:
+            self.store.write_batch(records)
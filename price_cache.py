@@ -0,0 +1,158 @@
+# price_cache.py
+# Contains the process-wide TTL cache for ticker prices and FX rates
+
+import json
+import os
+import threading
+import time
+
+# Seconds a value is served without asking the network again
+TICKER_TTL = 15
+FX_TTL = 3600
+# Past its TTL a value is still served (and refreshed in the background)
+# until it is this old; after that callers wait for a fresh fetch
+TICKER_MAX_STALE = 300
+FX_MAX_STALE = 7 * 24 * 3600
+CACHE_FILE = "price_cache.json"
+
+
+class PriceCache:
+    # Values are grouped by kind ("ticker", "fx") so each kind has its own
+    # TTLs. Timestamps are wall-clock so the warm cache on disk stays
+    # meaningful across restarts.
+
+    def __init__(self, ttls=None, max_stale=None, clock=time.time):
+        self.ttls = {"ticker": TICKER_TTL, "fx": FX_TTL}
+        self.ttls.update(ttls or {})
+        self.max_stale = {"ticker": TICKER_MAX_STALE, "fx": FX_MAX_STALE}
+        self.max_stale.update(max_stale or {})
+        self.clock = clock
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "errors": self.errors,
+                "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            }
+
+    def get(self, kind, key, fetch):
+        # fetch() returns the value for key; see get_many
+        return self.get_many(kind, [key], lambda keys: {key: fetch()}).get(key)
+
+    def get_many(self, kind, keys, fetch):
+        # fetch(keys) returns {key: value} for the keys it could resolve;
+        # keys it leaves out are cached as None, so an unknown symbol is not
+        # asked for on every call. Fresh values are returned as they are;
+        # stale ones are returned too and refreshed on a background thread;
+        # missing or expired ones are fetched now in a single call. If that
+        # call fails, whatever expired values exist are returned and the
+        # error is re-raised only when there is nothing to show.
+        now = self.clock()
+        ttl, max_stale = self.ttls[kind], self.max_stale[kind]
+        found, stale, missing = {}, [], []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get((kind, key))
+                age = now - entry[1] if entry else None
+                if entry and age <= ttl:
+                    found[key] = entry[0]
+                    self.hits += 1
+                elif entry and age <= max_stale:
+                    found[key] = entry[0]
+                    self.stale_hits += 1
+                    if (kind, key) not in self._refreshing:
+                        self._refreshing.add((kind, key))
+                        stale.append((key, entry[0] is None))
+                else:
+                    self.misses += 1
+                    missing.append(key)
+        if stale:
+            # Known-bad keys are retried on their own so they can't spoil a
+            # batch fetch of the good ones
+            groups = [[key for key, bad in stale if not bad], [key for key, bad in stale if bad]]
+            threading.Thread(target=self._refresh, args=(kind, [g for g in groups if g], fetch),
+                             name="price-cache-refresh", daemon=True).start()
+        if missing:
+            try:
+                fetched = fetch(missing)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                    expired = {key: self._entries[(kind, key)][0] for key in missing if (kind, key) in self._entries}
+                if not found and not expired:
+                    raise
+                found.update(expired)
+            else:
+                fetched = {key: fetched.get(key) for key in missing}
+                self.put_many(kind, fetched)
+                found.update(fetched)
+        return found
+
+    def _refresh(self, kind, groups, fetch):
+        for keys in groups:
+            try:
+                fetched = fetch(keys)
+                self.put_many(kind, {key: fetched.get(key) for key in keys})
+                with self._lock:
+                    self.refreshes += 1
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+            finally:
+                with self._lock:
+                    self._refreshing.difference_update((kind, key) for key in keys)
+
+    def put_many(self, kind, values, fetched_at=None):
+        fetched_at = self.clock() if fetched_at is None else fetched_at
+        with self._lock:
+            for key, value in values.items():
+                self._entries[(kind, key)] = (value, fetched_at)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def load(self, path=CACHE_FILE):
+        # Warm start: entries too old to ever be served are skipped
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, "r") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        now = self.clock()
+        loaded = 0
+        with self._lock:
+            for kind, key, value, fetched_at in saved.get("entries", []):
+                if kind in self.max_stale and now - fetched_at <= self.max_stale[kind]:
+                    self._entries.setdefault((kind, key), (value, fetched_at))
+                    loaded += 1
+        return loaded
+
+    def save(self, path=CACHE_FILE):
+        with self._lock:
+            entries = [[kind, key, value, fetched_at] for (kind, key), (value, fetched_at) in self._entries.items()]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"entries": entries}, f)
+        os.replace(tmp_path, path)
+
+
+# Shared by every client in the process, so switching wallets or refreshing
+# again within the TTL reuses the same prices
+PRICE_CACHE = PriceCache()
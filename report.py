@@ -0,0 +1,289 @@
+# report.py
+# Contains the background PDF report job and a small streaming PDF writer
+
+import os
+import threading
+import zlib
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from ledger import MONTHS
+from tracing import TRACER
+
+# A4 in points
+PAGE_WIDTH = 595.28
+PAGE_HEIGHT = 841.89
+MARGIN = 40
+ROW_HEIGHT = 14
+FONT_SIZE = 9
+# Rows are formatted and written this many at a time between cancel checks
+ROW_BLOCK = 500
+
+REPORT_COLUMNS = [
+    # (ledger key, heading, width in points)
+    ("Month", "Month", 95),
+    ("Year", "Year", 55),
+    ("Salary", "Salary", 95),
+    ("Expenses", "Expenses", 95),
+    ("Savings", "Savings", 87),
+    ("Invested", "Invested", 88),
+]
+AMOUNT_KEYS = ["Salary", "Expenses", "Savings", "Invested"]
+
+# Helvetica advance widths (per 1000 units) for the characters numbers use;
+# anything else is treated as a digit
+_HELVETICA_WIDTHS = {",": 278, ".": 278, "-": 333, " ": 278}
+
+
+def text_width(text, size):
+    return sum(_HELVETICA_WIDTHS.get(ch, 556) for ch in text) * size / 1000
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("latin-1", "replace")
+
+
+class PdfWriter:
+    # Writes a PDF one page at a time. Each finished page goes straight to
+    # the file, so only the object offsets are kept in memory. Uses the
+    # standard Helvetica fonts (nothing embedded) and RGB images.
+
+    CATALOG, PAGES, FONT, FONT_BOLD, RESOURCES = 1, 2, 3, 4, 5
+
+    def __init__(self, f):
+        self.f = f
+        self.offsets = {}
+        self.next_id = 6
+        self.page_ids = []
+        self.images = {}
+        self.f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _object(self, obj_id, body, stream=None):
+        self.offsets[obj_id] = self.f.tell()
+        self.f.write(b"%d 0 obj\n" % obj_id)
+        if stream is None:
+            self.f.write(body + b"\nendobj\n")
+        else:
+            self.f.write(body + b"\nstream\n" + stream + b"\nendstream\nendobj\n")
+
+    def _new_id(self):
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def add_image(self, rgb):
+        # rgb: (height, width, 3) uint8 array; returns the name to draw it with
+        height, width = rgb.shape[:2]
+        data = zlib.compress(np.ascontiguousarray(rgb, dtype=np.uint8).tobytes())
+        obj_id = self._new_id()
+        self._object(obj_id, b"<< /Type /XObject /Subtype /Image /Width %d /Height %d "
+                             b"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode /Length %d >>"
+                     % (width, height, len(data)), data)
+        name = "Im%d" % (len(self.images) + 1)
+        self.images[name] = obj_id
+        return name
+
+    def add_page(self, content):
+        data = zlib.compress(content)
+        content_id = self._new_id()
+        page_id = self._new_id()
+        self._object(content_id, b"<< /Filter /FlateDecode /Length %d >>" % len(data), data)
+        self._object(page_id, b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] /Resources %d 0 R /Contents %d 0 R >>"
+                     % (self.PAGES, PAGE_WIDTH, PAGE_HEIGHT, self.RESOURCES, content_id))
+        self.page_ids.append(page_id)
+
+    def close(self):
+        self._object(self.FONT, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        self._object(self.FONT_BOLD, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+        images = b"".join(b"/%s %d 0 R " % (name.encode(), obj_id) for name, obj_id in self.images.items())
+        self._object(self.RESOURCES, b"<< /Font << /F1 %d 0 R /F2 %d 0 R >> /XObject << %s>> >>"
+                     % (self.FONT, self.FONT_BOLD, images))
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        self._object(self.PAGES, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_ids)))
+        self._object(self.CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES)
+        xref = self.f.tell()
+        self.f.write(b"xref\n0 %d\n0000000000 65535 f \n" % self.next_id)
+        for obj_id in range(1, self.next_id):
+            self.f.write(b"%010d 00000 n \n" % self.offsets[obj_id])
+        self.f.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                     % (self.next_id, self.CATALOG, xref))
+
+
+class Page:
+    # Collects the drawing operators for one page
+    def __init__(self):
+        self.ops = []
+
+    def text(self, x, y, text, size=FONT_SIZE, bold=False, align="left", width=0):
+        if align == "right":
+            x += width - text_width(text, size)
+        font = b"/F2" if bold else b"/F1"
+        self.ops.append(b"BT %s %.1f Tf %.2f %.2f Td (%s) Tj ET" % (font, size, x, PAGE_HEIGHT - y, _escape(text)))
+
+    def line(self, x1, y1, x2, y2):
+        self.ops.append(b"%.2f %.2f m %.2f %.2f l S" % (x1, PAGE_HEIGHT - y1, x2, PAGE_HEIGHT - y2))
+
+    def image(self, name, x, y, width, height):
+        self.ops.append(b"q %.2f 0 0 %.2f %.2f %.2f cm /%s Do Q" % (width, height, x, PAGE_HEIGHT - y - height, name.encode()))
+
+    def content(self):
+        return b"\n".join(self.ops)
+
+
+def render_chart(x, series, title, width=515, height=230, dpi=100):
+    # Rasterizes a line chart with a private Agg figure (safe off the GUI
+    # thread); long series are reduced to one min/max pair per pixel column
+    from charts import downsample_minmax
+    fig = Figure(figsize=(width / 72, height / 72), dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    buckets = int(width / 72 * dpi)
+    for name, y in series.items():
+        ax.plot(*downsample_minmax(x, np.asarray(y, dtype=float), buckets), label=name)
+    ax.set_title(title)
+    ax.grid(True)
+    ax.legend(loc="upper left")
+    fig.tight_layout()
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba())[:, :, :3].copy()
+
+
+def format_amount(value):
+    return f"{value:,.2f}"
+
+
+class ReportJob:
+    # Writes a ledger report on a background thread. The GUI polls
+    # progress()/done and may call cancel(); the file only appears at `path`
+    # once the report is complete.
+
+    def __init__(self, ledger, path, title="Personal Finance Report"):
+        # Work on a snapshot so edits made while the report runs don't race it
+        self.ledger = ledger.copy()
+        self.path = path
+        self.title = title
+        self.total = len(self.ledger)
+        self.rows_written = 0
+        self.pages = 0
+        self.error = None
+        self.cancelled = False
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="pdf-report", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def progress(self):
+        return self.rows_written, self.total
+
+    @property
+    def done(self):
+        return not self._thread.is_alive() and self._thread.ident is not None
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        return self.done
+
+    def _run(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            with TRACER.span("report"), open(tmp_path, "wb") as f:
+                self._write(PdfWriter(f))
+            if self._cancel.is_set():
+                self.cancelled = True
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, self.path)
+        except Exception as e:
+            self.error = str(e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _write(self, writer):
+        ledger = self.ledger
+        totals = ledger.totals()
+        months = np.arange(len(ledger))
+
+        # Summary page: grand totals and charts
+        page = Page()
+        page.text(MARGIN, MARGIN + 10, self.title, size=16, bold=True)
+        y = MARGIN + 40
+        page.text(MARGIN, y, f"Entries: {self.total:,}", size=10)
+        for key in AMOUNT_KEYS:
+            y += ROW_HEIGHT
+            page.text(MARGIN, y, f"{key}:", size=10)
+            page.text(MARGIN + 80, y, format_amount(totals[key]), size=10, align="right", width=120)
+        y += 2 * ROW_HEIGHT
+        if self.total:
+            charts = [
+                ("Monthly Finance Overview", {key: ledger.column(key) for key in ("Expenses", "Savings", "Invested")}),
+                ("Cumulative Savings and Investments", {key: ledger.cumsum(key) for key in ("Savings", "Invested")}),
+            ]
+            chart_width = PAGE_WIDTH - 2 * MARGIN
+            for title, series in charts:
+                if self._cancel.is_set():
+                    return
+                with TRACER.span("chart"):
+                    name = writer.add_image(render_chart(months, series, title))
+                page.image(name, MARGIN, y, chart_width, 230)
+                y += 240
+        writer.add_page(page.content())
+        self.pages = 1
+
+        # Table pages: header, rows, then a per-page subtotal
+        with TRACER.span("pages"):
+            self._write_pages(writer, totals)
+        if self._cancel.is_set():
+            return
+        with TRACER.span("close"):
+            writer.close()
+
+    def _write_pages(self, writer, totals):
+        ledger = self.ledger
+        rows_per_page = int((PAGE_HEIGHT - 2 * MARGIN - 4 * ROW_HEIGHT) // ROW_HEIGHT)
+        columns = {key: ledger.column(key) for key, _, _ in REPORT_COLUMNS}
+        for start in range(0, self.total, rows_per_page):
+            stop = min(start + rows_per_page, self.total)
+            page = Page()
+            y = self._header(page)
+            for block in range(start, stop, ROW_BLOCK):
+                if self._cancel.is_set():
+                    return
+                for i in range(block, min(block + ROW_BLOCK, stop)):
+                    y += ROW_HEIGHT
+                    self._row(page, y, [
+                        MONTHS[columns["Month"][i] - 1] if columns["Month"][i] else "",
+                        str(columns["Year"][i]) if columns["Year"][i] else "",
+                    ] + [format_amount(columns[key][i]) for key in AMOUNT_KEYS])
+            y += ROW_HEIGHT
+            page.line(MARGIN, y - ROW_HEIGHT + 4, PAGE_WIDTH - MARGIN, y - ROW_HEIGHT + 4)
+            subtotals = [format_amount(columns[key][start:stop].sum()) for key in AMOUNT_KEYS]
+            self._row(page, y, ["Page subtotal", ""] + subtotals, bold=True)
+            if stop == self.total:
+                y += ROW_HEIGHT
+                self._row(page, y, ["Total", ""] + [format_amount(totals[key]) for key in AMOUNT_KEYS], bold=True)
+            self.pages += 1
+            page.text(MARGIN, PAGE_HEIGHT - MARGIN / 2, f"Page {self.pages}", size=8)
+            writer.add_page(page.content())
+            self.rows_written = stop
+
+    def _header(self, page):
+        y = MARGIN + ROW_HEIGHT
+        self._row(page, y, [heading for _, heading, _ in REPORT_COLUMNS], bold=True)
+        page.line(MARGIN, y + 4, PAGE_WIDTH - MARGIN, y + 4)
+        return y
+
+    def _row(self, page, y, cells, bold=False):
+        x = MARGIN
+        for (key, _, width), cell in zip(REPORT_COLUMNS, cells):
+            if key in AMOUNT_KEYS:
+                page.text(x, y, cell, bold=bold, align="right", width=width - 6)
+            else:
+                page.text(x, y, cell, bold=bold)
+            x += width
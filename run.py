@@ -1,11 +1,53 @@
+import argparse
+import os
 import sys
 
-from PySide6.QtWidgets import QApplication
-from main_qt import FinanceApp
 
-if __name__ == "__main__":
+def run_headless(paths, output_dir=None):
+    # Only the pure-Python engine is imported here; Qt is never loaded
+    from engine import run_batch
+    failed = 0
+    written = {}
+    for path in paths:
+        # The extension stays in the name so ledger.csv and ledger.json
+        # don't share an output file
+        name = os.path.basename(path)
+        out_dir = output_dir or os.path.dirname(path) or "."
+        output_path = os.path.join(out_dir, f"{name}_results.json")
+        key = os.path.normcase(os.path.abspath(output_path))
+        if key in written:
+            # Same file name from another directory with -o
+            print(f"{path}: {output_path} was already written for {written[key]}", file=sys.stderr)
+            failed += 1
+            continue
+        written[key] = path
+        try:
+            count, errors = run_batch(path, output_path)
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        print(f"{path}: {count} records -> {output_path}" + (f" ({errors} skipped)" if errors else ""))
+    return 1 if failed else 0
+
+
+def run_gui():
+    from PySide6.QtWidgets import QApplication
+    from main_qt import FinanceApp
+
     app = QApplication(sys.argv)
     win = FinanceApp()
     win.resize(700, 900)
     win.show()
-    sys.exit(app.exec())
+    return app.exec()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Personal Finance Tracker")
+    parser.add_argument("--headless", nargs="+", metavar="LEDGER",
+                        help="process CSV/JSON ledgers through the engine without the GUI")
+    parser.add_argument("-o", "--output-dir", help="where to write <file name>_results.json (headless only)")
+    args = parser.parse_args()
+    if args.headless:
+        sys.exit(run_headless(args.headless, args.output_dir))
+    sys.exit(run_gui())
@@ -0,0 +1,163 @@
+# snapshots.py
+# Contains the append-only wallet snapshot history and its downsampled queries (no Qt)
+
+import json
+import os
+import time
+from urllib.parse import unquote
+
+import numpy as np
+
+SNAPSHOT_DIR = "wallet_history"
+# One record per asset per snapshot. Asset ids index the wallet's
+# <name>.assets.json list; prices are in USD.
+RECORD_DTYPE = np.dtype([("asset", "<u2"), ("qty", "<f8"), ("price", "<f8")])
+# One record per snapshot, so value queries never touch the per-asset file;
+# offset/count locate the snapshot's asset records
+TOTAL_DTYPE = np.dtype([("t", "<i8"), ("value_usd", "<f8"), ("usd_to_aed", "<f8"), ("offset", "<i8"), ("count", "<u4")])
+# Bucket widths in seconds; weeks start on Monday (the epoch was a Thursday)
+INTERVALS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+WEEK_OFFSET = 3 * 86400
+
+
+def _append(path, data, itemsize):
+    # Appends whole records, first dropping a partial one left by an
+    # interrupted write; returns the record count before this append
+    with open(path, "ab") as f:
+        size = f.tell()
+        if size % itemsize:
+            size -= size % itemsize
+            f.truncate(size)
+        f.write(data)
+    return size // itemsize
+
+
+# Characters kept as-is in file names. Everything else is percent-encoded,
+# capitals included, because "Main" and "main" are the same file on
+# case-insensitive filesystems
+FILENAME_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789_.-")
+
+
+def wallet_filename(wallet):
+    # Collision-free and reversible ("a b", "a/b" and "a_b" stay apart, and
+    # wallets() recovers the names with unquote)
+    return "".join(chr(b) if chr(b) in FILENAME_CHARS else f"%{b:02X}" for b in wallet.encode("utf-8"))
+
+
+class SnapshotStore:
+    # Per wallet: <name>.records (per-asset records), <name>.totals (one
+    # record per snapshot) and <name>.assets.json (asset names by id). Both
+    # binary files are only ever appended to and are read back as memory
+    # maps, so loading years of minute snapshots costs a few page faults.
+
+    def __init__(self, directory=SNAPSHOT_DIR):
+        self.directory = directory
+        self._assets = {}
+
+    def _path(self, wallet, suffix):
+        return os.path.join(self.directory, wallet_filename(wallet) + suffix)
+
+    def wallets(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(unquote(name[:-len(".totals")]) for name in os.listdir(self.directory) if name.endswith(".totals"))
+
+    def assets(self, wallet):
+        if wallet not in self._assets:
+            path = self._path(wallet, ".assets.json")
+            names = []
+            if os.path.exists(path):
+                with open(path, "r") as f:
+                    names = json.load(f)
+            self._assets[wallet] = names
+        return self._assets[wallet]
+
+    def _asset_ids(self, wallet, names):
+        known = self.assets(wallet)
+        index = {name: i for i, name in enumerate(known)}
+        new = [name for name in dict.fromkeys(names) if name not in index]
+        if new:
+            for name in new:
+                index[name] = len(known)
+                known.append(name)
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(wallet, ".assets.json")
+            with open(path + ".tmp", "w") as f:
+                json.dump(known, f)
+            os.replace(path + ".tmp", path)
+        return [index[name] for name in names]
+
+    def append(self, wallet, rows, usd_to_aed, t=None):
+        # rows are wallet table rows (asset, total, price); snapshots must be
+        # appended in time order
+        t = int(time.time() if t is None else t)
+        rows = [row for row in rows if "price" in row]
+        last = self.last_time(wallet)
+        if last is not None and t < last:
+            raise ValueError(f"snapshot at {t} is older than the last one ({last})")
+        records = np.empty(len(rows), dtype=RECORD_DTYPE)
+        records["asset"] = self._asset_ids(wallet, [row["asset"] for row in rows])
+        records["qty"] = [row["total"] for row in rows]
+        records["price"] = [row["price"] for row in rows]
+        os.makedirs(self.directory, exist_ok=True)
+        # Records first: a crash in between leaves unreferenced records,
+        # never a total pointing at missing ones
+        offset = _append(self._path(wallet, ".records"), records.tobytes(), RECORD_DTYPE.itemsize)
+        value = float((records["qty"] * records["price"]).sum())
+        total = np.array([(t, value, usd_to_aed, offset, len(records))], dtype=TOTAL_DTYPE)
+        _append(self._path(wallet, ".totals"), total.tobytes(), TOTAL_DTYPE.itemsize)
+
+    def _load(self, wallet, suffix, dtype):
+        path = self._path(wallet, suffix)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=dtype)
+        # Ignore a partial trailing record left by an interrupted append
+        count = os.path.getsize(path) // dtype.itemsize
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+    def last_time(self, wallet):
+        totals = self._load(wallet, ".totals", TOTAL_DTYPE)
+        return int(totals["t"][-1]) if len(totals) else None
+
+    def totals(self, wallet, start=None, end=None):
+        # (times, values in AED) for snapshots with start <= t < end
+        totals = self._load(wallet, ".totals", TOTAL_DTYPE)
+        t = totals["t"]
+        lo = 0 if start is None else np.searchsorted(t, start, "left")
+        hi = len(t) if end is None else np.searchsorted(t, end, "left")
+        window = totals[lo:hi]
+        return np.asarray(window["t"]), np.asarray(window["value_usd"] * window["usd_to_aed"])
+
+    def ohlc(self, wallet, interval="day", start=None, end=None):
+        # Open/high/low/close of the wallet's AED value per hour, day or week
+        width = INTERVALS[interval]
+        offset = WEEK_OFFSET if interval == "week" else 0
+        t, value = self.totals(wallet, start, end)
+        if not len(t):
+            empty = np.empty(0)
+            return {"time": np.empty(0, dtype=np.int64), "open": empty, "high": empty, "low": empty, "close": empty}
+        buckets = (t + offset) // width
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(buckets)) + 1])
+        ends = np.concatenate([starts[1:], [len(t)]]) - 1
+        return {
+            "time": buckets[starts] * width - offset,
+            "open": value[starts],
+            "high": np.maximum.reduceat(value, starts),
+            "low": np.minimum.reduceat(value, starts),
+            "close": value[ends],
+        }
+
+    def holdings(self, wallet, t=None):
+        # {asset: (qty, price)} from the last snapshot at or before t
+        totals = self._load(wallet, ".totals", TOTAL_DTYPE)
+        if not len(totals):
+            return {}
+        i = len(totals) - 1 if t is None else np.searchsorted(totals["t"], t, "right") - 1
+        if i < 0:
+            return {}
+        offset, count = int(totals["offset"][i]), int(totals["count"][i])
+        records = self._load(wallet, ".records", RECORD_DTYPE)[offset:offset + count]
+        names = self.assets(wallet)
+        return {names[r["asset"]]: (float(r["qty"]), float(r["price"])) for r in records}
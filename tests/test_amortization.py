@@ -0,0 +1,69 @@
+# test_amortization.py
+# Contains checks of the vectorized loan schedules against the annuity formula
+
+import numpy as np
+import pytest
+
+from amortization import CACHED_PAIRS, monthly_payments, payment_factors, scenario_sweep, schedule
+
+
+def annuity(amount, rate, years):
+    # Textbook payment: P * r / (1 - (1 + r)^-n), or P / n without interest
+    r, n = rate / 12, years * 12
+    return amount / n if r == 0 else amount * r / (1 - (1 + r) ** -n)
+
+
+LOANS = [(50000.0, 0.0749, 4), (300000.0, 0.045, 25), (12000.0, 0.0, 3), (1000.0, 0.12, 1)]
+
+
+@pytest.mark.parametrize("amount, rate, years", LOANS)
+def test_schedule_matches_annuity(amount, rate, years):
+    result = schedule(amount, rate, years)
+    months = years * 12
+    assert result["payment"].shape == (1, months)
+    assert result["payment"][0] == pytest.approx(np.full(months, annuity(amount, rate, years)))
+    assert result["balance"][0, -1] == pytest.approx(0.0, abs=1e-6)
+    assert result["principal"][0].sum() == pytest.approx(amount)
+    assert result["payment"][0] == pytest.approx(result["interest"][0] + result["principal"][0])
+
+
+def test_schedule_broadcasts_and_pads():
+    amounts, rates, years = zip(*LOANS)
+    result = schedule(amounts, rates, years)
+    assert result["balance"].shape == (len(LOANS), max(years) * 12)
+    for i, (amount, rate, term) in enumerate(LOANS):
+        months = term * 12
+        assert result["payment"][i, :months] == pytest.approx(np.full(months, annuity(amount, rate, term)))
+        assert not result["payment"][i, months:].any()
+        assert result["balance"][i, months - 1] == pytest.approx(0.0, abs=1e-6)
+
+
+@pytest.mark.parametrize("rate", [0.0749, 0.0])
+def test_prepayments_end_early_at_zero(rate):
+    result = schedule(50000.0, rate, 4, prepayments=[500.0])
+    balance = result["balance"][0]
+    paid_off = int(np.argmax(balance <= 1e-9))
+    assert 0 < paid_off < 47
+    assert not balance[paid_off:].any()
+    assert result["principal"][0].sum() == pytest.approx(50000.0)
+    # Same loan iterated month by month without prepayments gives the closed form
+    plain = schedule(50000.0, rate, 4, prepayments=[0.0])
+    assert plain["balance"] == pytest.approx(schedule(50000.0, rate, 4)["balance"], abs=1e-6)
+
+
+def test_vectorized_factors_match_cached():
+    rates = np.linspace(0.0, 0.2, CACHED_PAIRS + 50)
+    wide = payment_factors(rates, 10)
+    assert wide == pytest.approx([annuity(1.0, r, 10) for r in rates])
+    assert monthly_payments(1000.0, rates[:3], 10) == pytest.approx([annuity(1000.0, r, 10) for r in rates[:3]])
+
+
+def test_scenario_sweep_grid():
+    sweep = scenario_sweep([10000.0, 20000.0], [0.0, 0.05], [1, 5])
+    assert sweep["payment"].shape == (2, 2, 2)
+    for i, amount in enumerate([10000.0, 20000.0]):
+        for j, rate in enumerate([0.0, 0.05]):
+            for k, years in enumerate([1, 5]):
+                payment = annuity(amount, rate, years)
+                assert sweep["payment"][i, j, k] == pytest.approx(payment)
+                assert sweep["total_interest"][i, j, k] == pytest.approx(payment * years * 12 - amount)
@@ -0,0 +1,65 @@
+# test_ledger.py
+# Contains checks of the Ledger's running totals against full recomputes
+
+import random
+
+import pytest
+
+from ledger import TRANSACTION_FIELDS, Ledger
+
+
+def month_entry(rng, category):
+    return {
+        "Month": rng.choice(["January", "February", "March"]),
+        "Year": 2024,
+        "Salary": rng.uniform(5000, 40000),
+        "Expenses": rng.uniform(1000, 9000),
+        "Savings": rng.uniform(0, 5000),
+        "Invested": rng.uniform(0, 5000),
+        "Category": category,
+        "Debt Type": rng.choice(["personal", "housing"]),
+    }
+
+
+def test_aggregates_follow_mutations():
+    rng = random.Random(7)
+    ledger = Ledger()
+    for i in range(200):
+        ledger.append(month_entry(rng, rng.choice(["rent", "food", None])))
+        if i % 3 == 0:
+            ledger.delete(rng.randrange(len(ledger)))
+        assert ledger.check_aggregates() == []
+    ledger.delete(0)
+    ledger.delete(-1)
+    assert ledger.check_aggregates() == []
+    copy = ledger.copy()
+    copy.append(month_entry(rng, "new"))
+    assert copy.check_aggregates() == []
+    ledger.clear()
+    assert ledger.check_aggregates() == []
+    assert ledger.total("Salary") == 0.0
+    ledger.append(month_entry(rng, "food"))
+    assert ledger.check_aggregates() == []
+
+
+def test_category_totals_default_key():
+    rng = random.Random(1)
+    ledger = Ledger()
+    entries = [month_entry(rng, category) for category in ["rent", "food", "rent"]]
+    ledger.extend(entries)
+    totals = ledger.category_totals("Savings")
+    assert totals["rent"] == pytest.approx(entries[0]["Savings"] + entries[2]["Savings"])
+    # sum_by_category also lists the other column's names, at zero
+    assert totals == pytest.approx({name: total for name, total in ledger.sum_by_category("Savings").items() if total})
+    assert set(ledger.category_totals("Savings", "Debt Type")) <= {"personal", "housing"}
+
+    transactions = Ledger(TRANSACTION_FIELDS)
+    transactions.append({"date": "2024-01-01", "description": "rent", "amount": 100.0, "category": "home"})
+    assert transactions.category_totals("amount") == {"home": 100.0}
+
+
+def test_category_totals_without_category_column():
+    ledger = Ledger([("amount", "float")])
+    ledger.append({"amount": 1.0})
+    with pytest.raises(KeyError):
+        ledger.category_totals("amount")
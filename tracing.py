@@ -0,0 +1,196 @@
+# tracing.py
+# Contains the optional tracing spans and metrics log behind the diagnostics panel (no Qt)
+
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+METRICS_FILE = "finance_metrics.jsonl"
+METRICS_MAX_BYTES = 1 << 20
+METRICS_BACKUPS = 3
+RECENT_SPANS = 200
+
+
+class _NoSpan:
+    # Shared stand-in returned while tracing is off, so a disabled span costs
+    # one attribute check and an empty with-block
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "parent", "path", "started", "wall", "cpu", "mem_start", "peak")
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent = stack[-1] if stack else None
+        self.path = f"{self.parent.path}/{self.name}" if self.parent else self.name
+        stack.append(self)
+        self.mem_start = None
+        if self.tracer.memory and tracemalloc.is_tracing():
+            # The peak counter is process-wide: note the parent's peak so far
+            # before resetting it for this span
+            current, peak = tracemalloc.get_traced_memory()
+            if self.parent is not None and self.parent.mem_start is not None:
+                self.parent.peak = max(self.parent.peak, peak)
+            tracemalloc.reset_peak()
+            self.mem_start = self.peak = current
+        self.started = time.time()
+        self.cpu = time.thread_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+        record = {
+            "span": self.path,
+            "start": round(self.started, 3),
+            "wall_ms": round(wall * 1000, 3),
+            "cpu_ms": round(cpu * 1000, 3),
+            "thread": threading.current_thread().name,
+        }
+        if self.mem_start is not None and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(self.peak, peak)
+            record["alloc_kb"] = round((current - self.mem_start) / 1024, 1)
+            record["peak_kb"] = round((peak - self.mem_start) / 1024, 1)
+            if self.parent is not None and self.parent.mem_start is not None:
+                self.parent.peak = max(self.parent.peak, peak)
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        self.tracer._stack().pop()
+        self.tracer._record(record)
+        return False
+
+
+class Tracer:
+    # Spans nest per thread (a slot and its phases share a path such as
+    # "add_data/calculate"); worker threads start their own trees. Finished
+    # spans go to a ring buffer for the diagnostics panel and, one JSON line
+    # each, to a size-rotated metrics file. Wall time is perf_counter, CPU
+    # time is the span's thread only, and memory is the tracemalloc change
+    # and peak above the starting point (allocations by other threads
+    # running at the same time are included).
+
+    def __init__(self, path=METRICS_FILE, max_bytes=METRICS_MAX_BYTES, backups=METRICS_BACKUPS, recent=RECENT_SPANS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.enabled = False
+        self.memory = False
+        self.recorded = 0
+        self._recent = deque(maxlen=recent)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._log = None
+        self._started_tracemalloc = False
+
+    def enable(self, memory=True):
+        with self._lock:
+            if self._log is None:
+                handler = RotatingFileHandler(self.path, maxBytes=self.max_bytes, backupCount=self.backups, delay=True)
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                self._log = logging.getLogger(f"finance.metrics.{id(self)}")
+                self._log.propagate = False
+                self._log.setLevel(logging.INFO)
+                self._log.addHandler(handler)
+            if memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            elif not memory and self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+            self.memory = memory
+            self.enabled = True
+
+    def disable(self):
+        with self._lock:
+            self.enabled = False
+            self.memory = False
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+            if self._log is not None:
+                for handler in list(self._log.handlers):
+                    self._log.removeHandler(handler)
+                    handler.close()
+                self._log = None
+
+    def span(self, name):
+        return Span(self, name) if self.enabled else _NO_SPAN
+
+    def recent(self, limit=None):
+        # Finished spans, newest first
+        with self._lock:
+            spans = list(self._recent)
+        spans.reverse()
+        return spans[:limit] if limit else spans
+
+    def clear(self):
+        with self._lock:
+            self._recent.clear()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, record):
+        with self._lock:
+            self._recent.append(record)
+            self.recorded += 1
+            log = self._log
+        if log is not None:
+            log.info(json.dumps(record, separators=(",", ":")))
+
+
+def traced(name=None, tracer=None):
+    # Decorator for slots: the function runs inside a span named after it.
+    # Qt drops signal arguments a plain slot doesn't take, but can't tell for
+    # a wrapper, so surplus positional arguments are dropped here instead.
+    def decorate(fn):
+        label = name or fn.__name__
+        params = inspect.signature(fn).parameters.values()
+        if any(p.kind == p.VAR_POSITIONAL for p in params):
+            n_args = None
+        else:
+            n_args = sum(p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) for p in params)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            args = args[:n_args]
+            t = tracer or TRACER
+            if not t.enabled:
+                return fn(*args, **kwargs)
+            with Span(t, label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# Shared by the UI and the worker threads. FINANCE_TRACE=1 turns tracing on
+# at startup; FINANCE_TRACE=time records timings without tracemalloc.
+TRACER = Tracer()
+if os.environ.get("FINANCE_TRACE"):
+    TRACER.enable(memory=os.environ["FINANCE_TRACE"] != "time")
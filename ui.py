@@ -3,9 +3,10 @@
 
 from PySide6.QtWidgets import (
     QTabWidget, QVBoxLayout, QHBoxLayout, QFormLayout, QLineEdit, QRadioButton, QButtonGroup, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QMessageBox, QTextEdit, QComboBox, QWidget
+    QTableView, QMessageBox, QTextEdit, QComboBox, QWidget
 )
 from PySide6.QtCore import Qt
+from models import LedgerTableModel, WalletTableModel
 
 def setup_main_tabs(app):
     app.tabs = QTabWidget()
@@ -51,8 +52,9 @@ def setup_main_tabs(app):
     form_widget.setLayout(form)
     data_layout.addWidget(form_widget)
 
-    app.table = QTableWidget(0, 5)
-    app.table.setHorizontalHeaderLabels(["Month", "Salary", "Expenses", "Savings", "Invested"])
+    app.table_model = LedgerTableModel(getattr(app, "data", None))
+    app.table = QTableView()
+    app.table.setModel(app.table_model)
     app.table.horizontalHeader().setStretchLastSection(True)
     data_layout.addWidget(app.table)
 
@@ -120,13 +122,11 @@ def setup_main_tabs(app):
     app.wallet_summary_label.setStyleSheet("font-weight: bold; font-size: 18px; margin-bottom: 16px; color: #00c3ff;")
     binance_layout.addWidget(app.wallet_summary_label)
 
-    app.wallet_table = QTableWidget()
-    app.wallet_table.setColumnCount(6)
-    app.wallet_table.setHorizontalHeaderLabels([
-        "Asset", "Total", "Price (USD)", "Price (AED)", "Daily PnL (%)", "Holding Value (AED)"
-    ])
+    app.wallet_model = WalletTableModel()
+    app.wallet_table = QTableView()
+    app.wallet_table.setModel(app.wallet_model)
     app.wallet_table.horizontalHeader().setStretchLastSection(True)
-    app.wallet_table.setEditTriggers(QTableWidget.NoEditTriggers)
+    app.wallet_table.setEditTriggers(QTableView.NoEditTriggers)
     app.wallet_table.setAlternatingRowColors(True)
     app.wallet_table.setStyleSheet("alternate-background-color: #2d3136; background-color: #232629;")
     binance_layout.addWidget(app.wallet_table)
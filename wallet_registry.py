@@ -0,0 +1,161 @@
+# wallet_registry.py
+# Contains the in-memory registry of saved Binance wallets (binance_wallets.json)
+
+import json
+import os
+import threading
+
+WALLETS_FILE = "binance_wallets.json"
+
+
+class WalletRegistry:
+    # The file is read once and then served from memory. It is only read
+    # again after invalidate(), or when reload_if_changed() sees that its
+    # stat differs from what was last read or written; watch() hooks that up
+    # to Qt file-change notifications. Updates merge just the changed
+    # entries into the file's current contents and replace it atomically, so
+    # entries saved by another instance are kept.
+
+    def __init__(self, path=WALLETS_FILE):
+        self.path = path
+        self._wallets = None
+        self._stamp = None
+        self._lock = threading.RLock()
+        self._watcher = None
+        self._listeners = []
+        self.reads = 0
+        self.writes = 0
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _read(self):
+        stamp = self._stat()
+        wallets = {}
+        if stamp is not None:
+            try:
+                with open(self.path, "r") as f:
+                    wallets = json.load(f)
+            except (OSError, ValueError):
+                wallets = {}
+            self.reads += 1
+        return wallets, stamp
+
+    def _loaded(self):
+        if self._wallets is None:
+            self._wallets, self._stamp = self._read()
+        return self._wallets
+
+    def all(self):
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._loaded().items()}
+
+    def names(self):
+        with self._lock:
+            return list(self._loaded())
+
+    def get(self, name):
+        with self._lock:
+            entry = self._loaded().get(name)
+            return dict(entry) if entry is not None else None
+
+    def __contains__(self, name):
+        with self._lock:
+            return name in self._loaded()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._loaded())
+
+    def invalidate(self):
+        with self._lock:
+            self._wallets = None
+
+    def reload_if_changed(self):
+        # True when the file changed behind our back and was re-read
+        with self._lock:
+            if self._wallets is not None and self._stat() == self._stamp:
+                return False
+            self._wallets, self._stamp = self._read()
+            return True
+
+    def update(self, changes=None, removed=()):
+        # changes: {name: entry}. Entries equal to what is stored are skipped;
+        # returns whether anything was written.
+        with self._lock:
+            wallets = self._loaded()
+            changes = {name: entry for name, entry in (changes or {}).items() if wallets.get(name) != entry}
+            removed = [name for name in removed if name in wallets]
+            if not changes and not removed:
+                return False
+            if self._stat() != self._stamp:
+                wallets, _ = self._read()
+            wallets = dict(wallets)
+            wallets.update(changes)
+            for name in removed:
+                wallets.pop(name, None)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(wallets, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._wallets = wallets
+            self._stamp = self._stat()
+            self.writes += 1
+            return True
+
+    def save(self, name, api_key, api_secret):
+        return self.update({name: {"api_key": api_key, "api_secret": api_secret}})
+
+    def remove(self, name):
+        return self.update(removed=[name])
+
+    def watch(self, on_change=None):
+        # Reload on file-change notifications from Qt. Every on_change()
+        # registered (once each) runs only when the contents really changed,
+        # not for our own writes.
+        from PySide6.QtCore import QFileSystemWatcher
+        if on_change is not None and on_change not in self._listeners:
+            self._listeners.append(on_change)
+        if self._watcher is not None:
+            return self._watcher
+        watcher = self._watcher = QFileSystemWatcher()
+        directory = os.path.dirname(os.path.abspath(self.path))
+
+        def rewatch():
+            # Atomic replaces drop the file from the watch list, and a file
+            # that doesn't exist yet is noticed through its directory
+            if os.path.exists(self.path):
+                if self.path not in watcher.files():
+                    watcher.addPath(self.path)
+                if watcher.directories():
+                    watcher.removePaths(watcher.directories())
+            elif directory not in watcher.directories():
+                watcher.addPath(directory)
+
+        def changed(_path):
+            rewatch()
+            if self.reload_if_changed():
+                for listener in list(self._listeners):
+                    listener()
+
+        watcher.fileChanged.connect(changed)
+        watcher.directoryChanged.connect(changed)
+        rewatch()
+        return watcher
+
+
+# Shared by the all-in-one app and the modular UI
+_registries = {}
+
+
+def get_registry(path=WALLETS_FILE):
+    key = os.path.abspath(path)
+    if key not in _registries:
+        _registries[key] = WalletRegistry(path)
+    return _registries[key]